@@ -33,7 +33,11 @@ setup(
     install_requires=[
         'gym', 'carla>=0.9.3', 'GPUtil', 'pygame', 'opencv-python', 'networkx'
     ],
-    extras_require={'test': ['tox', 'pytest', 'pytest-xdist', 'tox']},
+    extras_require={
+        'test': ['tox', 'pytest', 'pytest-xdist', 'tox'],
+        'numba': ['numba'],
+        'orjson': ['orjson']
+    },
     keywords='multi-agent learning environments connected autonomous driving '
     'OpenAI Gym CARLA',
     project_urls={
@@ -24,7 +24,7 @@ import traceback
 import socket
 import math
 
-import numpy as np  # linalg.norm is used
+import numpy as np
 import GPUtil
 from gym.spaces import Box, Discrete, Tuple, Dict
 import pygame
@@ -32,12 +32,20 @@ import carla
 
 from macad_gym.multi_actor_env import MultiActorEnv
 from macad_gym import LOG_DIR
-from macad_gym.core.sensors.utils import preprocess_image
+from macad_gym.core.carla_egg import DEFAULT_CARLA_SERVER
+from macad_gym.core.actor_table import ActorTable, pack_actor_flags
+from macad_gym.core.lazy_frames import LazyFrames
+from macad_gym.core.log_writer import LogWriter
+from macad_gym.core.actor_table import ACTOR_FLAG_COLLISION, \
+    ACTOR_FLAG_LANE, ACTOR_FLAG_SEND_MEAS, ACTOR_FLAG_EARLY_TERM, \
+    ACTOR_FLAG_LOG_IMAGES, ACTOR_FLAG_AUTO_CTRL, ACTOR_FLAG_MANUAL_CTRL, \
+    ACTOR_FLAG_LOG_MEAS
+from macad_gym.core.sensors.collector import CameraCollector
 from macad_gym.core.maps.nodeid_coord_map import TOWN01, TOWN02
 # from macad_gym.core.sensors.utils import get_transform_from_nearest_way_point
 from macad_gym.carla.reward import Reward
 from macad_gym.core.sensors.hud import HUD
-from macad_gym.viz.render import multi_view_render
+from macad_gym.viz.render import multi_view_render, get_surface_poses
 from macad_gym.carla.scenarios import update_scenarios_parameter
 # The following imports require carla to be imported already.
 from macad_gym.core.sensors.camera_manager import CameraManager
@@ -57,19 +65,20 @@ from macad_gym.carla.PythonAPI.agents.navigation.local_planner \
     import RoadOption  # noqa:E402
 
 logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    logger.info("orjson not found. Encoding measurement logs with json")
+    orjson = None
+
 # Set this where you want to save image outputs (or empty string to disable)
 CARLA_OUT_PATH = os.environ.get("CARLA_OUT", os.path.expanduser("~/carla_out"))
-if CARLA_OUT_PATH and not os.path.exists(CARLA_OUT_PATH):
-    os.makedirs(CARLA_OUT_PATH)
+if CARLA_OUT_PATH:
+    os.makedirs(CARLA_OUT_PATH, exist_ok=True)
 
 # Set this to the path of your Carla binary
-SERVER_BINARY = os.environ.get(
-    "CARLA_SERVER", os.path.expanduser("~/software/CARLA_0.9.4/CarlaUE4.sh"))
-
-assert os.path.exists(SERVER_BINARY), "Make sure CARLA_SERVER environment" \
-                                      " variable is set & is pointing to the" \
-                                      " CARLA server startup script (Carla" \
-                                      "UE4.sh). Refer to the README file/docs."
+SERVER_BINARY = os.environ.get("CARLA_SERVER", DEFAULT_CARLA_SERVER)
 
 # TODO: Clean env & actor configs to have appropriate keys based on the nature
 # of env
@@ -83,19 +92,26 @@ DEFAULT_MULTIENV_CONFIG = {
         "x_res": 84,
         "y_res": 84,
         "framestack": 1,
+        # Return the framestacked images as LazyFrames (shares frames across
+        # consecutive obs) instead of numpy arrays
+        "lazy_frames": False,
+        # Preprocess the images into pinned memory (requires torch & CUDA)
+        # for faster asynchronous copies to the GPU
+        "pin_memory": False,
         "discrete_actions": True,
         "squash_action_logits": False,
         "verbose": False,
         "use_depth_camera": False,
         "send_measurements": False,
         "enable_planner": True,
-        "sync_server": True
+        "sync_server": True,
+        "fixed_delta_seconds": 0.05
     },
     "actors": {
         "vehicle1": {
             "enable_planner": True,
             "render": True,  # Whether to render to screen or send to VFB
-            "framestack": 1,  # note: only [1, 2] currently supported
+            "framestack": 1,
             "convert_images_to_video": False,
             "early_terminate_on_collision": True,
             "verbose": False,
@@ -143,15 +159,73 @@ ROAD_OPTION_TO_COMMANDS_MAPPING = {
     RoadOption.LANEFOLLOW: "LANE_FOLLOW",
 }
 
+# Command names indexed by their ordinal
+COMMAND_NAMES = tuple(sorted(COMMAND_ORDINAL, key=COMMAND_ORDINAL.get))
+
+# Planner RoadOption to one-hot encoding index, built once at import
+ROAD_OPTION_TO_ORDINAL = {
+    k: COMMAND_ORDINAL[v]
+    for k, v in ROAD_OPTION_TO_COMMANDS_MAPPING.items()
+}
+
+# Discrete action (DISCRETE_ACTIONS key) following each planner command.
+# Used by get_next_actions
+COMMAND_TO_DISCRETE_ACTION = {
+    "REACH_GOAL": 0,
+    "GO_STRAIGHT": 3,
+    "TURN_RIGHT": 6,
+    "TURN_LEFT": 5,
+    "LANE_FOLLOW": 3,
+}
+
+# Continuous action (full throttle, no steer) used by get_next_actions
+CONTINUOUS_FORWARD_ACTION = (1, 0)
+
 # Threshold to determine that the goal has been reached based on distance
 DISTANCE_TO_GOAL_THRESHOLD = 0.5
 
 # Threshold to determine that the goal has been reached based on orientation
 ORIENTATION_TO_GOAL_THRESHOLD = math.pi / 4.0
 
+
+def _to_builtin(obj):
+    """Convert the numpy values in the measurements for the json encoder"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError("{} is not JSON serializable".format(type(obj)))
+
+
+# Compact encoder for the measurement logs, built once. Used if orjson isn't
+# available
+_json_encoder = json.JSONEncoder(separators=(",", ":"), default=_to_builtin)
+
+
+def encode_json_line(obj):
+    """Encode `obj` as a line of compact JSON (bytes)"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+    return (_json_encoder.encode(obj) + "\n").encode()
+
+
+# Whether the carla API can apply the controls of all actors in one batch
+# (carla>=0.9.5)
+BATCH_COMMANDS = hasattr(carla, "command") and hasattr(
+    carla.Client, "apply_batch_sync")
+
 # Number of retries if the server doesn't respond
 RETRIES_ON_ERROR = 2
 
+# Max. number of seconds to wait for a sensor's data after a server tick
+SENSOR_DATA_TIMEOUT = 10.0
+
+# Max. number of ticks for the cameras spawned by a reset to start streaming
+# (sync mode). Their first tick often produces no image
+RESET_TICKS = 3
+
+# Seconds to wait for the first images after each of those ticks
+FIRST_IMAGE_TIMEOUT = 1.0
+
 # Dummy Z coordinate to use when we only care about (x, y)
 GROUND_Z = 22
 
@@ -269,6 +343,7 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         self._map = self._server_map.split("/")[-1]
         self._render = self._env_config["render"]
         self._framestack = self._env_config["framestack"]
+        self._lazy_frames = self._env_config.get("lazy_frames", False)
         self._discrete_actions = self._env_config["discrete_actions"]
         self._squash_action_logits = self._env_config["squash_action_logits"]
         self._verbose = self._env_config["verbose"]
@@ -278,13 +353,20 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         self._y_res = self._env_config["y_res"]
         self._use_depth_camera = False  # !!test
         self._cameras = {}
+        #: Preprocesses the camera images off the step path. Started on reset
+        self._camera_collector = None
         self._sync_server = self._env_config["sync_server"]
+        self._fixed_delta_seconds = self._env_config.get(
+            "fixed_delta_seconds", 0.05)
 
         # self.config["server_map"] = "/Game/Carla/Maps/" + args.map
 
         # Initialize to be compatible with cam_manager to set HUD.
         pygame.font.init()  # for HUD
         self._hud = HUD(self._render_x_res, self._render_y_res)
+        # Shared by the cameras of all the actors. Sets the camera image size
+        self._cam_hud = HUD(self._env_config["x_res"],
+                            self._env_config["x_res"])
 
         # Needed by macad_agents
         if self._discrete_actions:
@@ -334,17 +416,52 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         self._server_port = None
         self._server_process = None
         self._client = None
-        self._num_steps = {}
-        self._total_reward = {}
-        self._prev_measurement = {}
-        self._prev_image = None
+        #: Per-actor step counts, rewards, done states & start/end positions
+        self._actor_table = ActorTable(self._actor_configs.keys())
+        for actor_id, actor_config in self._actor_configs.items():
+            self._actor_table.flags[self._actor_table.id_to_slot[
+                actor_id]] = pack_actor_flags(actor_config)
+        #: Reward function of each actor, indexed by its table slot
+        self._reward_flags = np.array(
+            [
+                self._actor_configs[actor_id]["reward_function"]
+                for actor_id in self._actor_table.ids
+            ],
+            dtype=str)
+        #: Per-actor function applying its actions. See `_compile_step`
+        self._step_fns = {}
+        # Per-actor frame stack. With lazy_frames, a ring buffer of the last
+        # `framestack` images & the index of the slot to be written next
+        # (which also holds the oldest image). Otherwise, the last stacked
+        # image (returned as obs, so never written to)
+        self._frame_ring = {}
+        self._frame_head = {}
+        #: Slot order (oldest to newest image) for each value of the head
+        self._frame_order = [
+            np.arange(head, head + self._framestack) % self._framestack
+            for head in range(self._framestack)
+        ]
         self._episode_id_dict = {}
+        #: Per-actor measurements dict with the fields that are constant for
+        #: the episode filled in. Copied by `_read_observation`
+        self._meas_templates = {}
+        #: Path of the measurement log of each actor's current episode
         self._measurements_file_dict = {}
+        self._log_writer = None
+        # pygame window & keyboard controller for manual_control actors.
+        # Created once by _init_manual_control
+        self._display = None
+        self._clock = None
+        self._keyboard_control = None
         self._weather = None
+        self._weather_num = None  # WEATHERS key last set on the server
         self._start_pos = {}  # Start pose for each actor
         self._end_pos = {}  # End pose for each actor
+        self._end_xy = {}  # (x, y) of the end pose, as floats
         self._start_coord = {}
         self._end_coord = {}
+        self._start_transforms = {}  # Cached start pose of each actor
+        self._blueprints = {}  # Cached blueprints for each actor type
         self._last_obs = None
         self._image = None
         self._surface = None
@@ -352,7 +469,6 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         self._video = False
         self._previous_actions = {}
         self._previous_rewards = {}
-        self._last_reward = {}
         self._agents = {}  # Dictionary of macad_agents with agent_id as key
         self._actors = {}  # Dictionary of actors with actor_id as key
         self._path_trackers = {}
@@ -361,7 +477,6 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         self._scenario_map = {}
         self._load_scenario(self._scenario_config)
         self._done_dict = {}
-        self._dones = set()  # Set of all done actor IDs
 
     @staticmethod
     def _get_free_tcp_port():
@@ -377,6 +492,11 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         Returns:
             N/A
         """
+        # Checked here rather than at import so that importing the env
+        # (Eg.: in unit tests) doesn't require a CARLA install
+        assert os.path.exists(SERVER_BINARY), "Make sure CARLA_SERVER " \
+            "environment variable is set & is pointing to the CARLA server " \
+            "startup script (CarlaUE4.sh). Refer to the README file/docs."
         print("Initializing new Carla server...")
         # Create a new server process and start the client.
         # First find a port that is free and then use it in order to avoid
@@ -467,6 +587,12 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         self.world = self._client.get_world()
         world_settings = self.world.get_settings()
         world_settings.synchronous_mode = self._sync_server
+        # Advance the simulation by a fixed time-step on every tick so that
+        # the sensor data produced by a tick is deterministic. Older CARLA
+        # versions set the time-step using the -benchmark -fps server flags
+        if self._sync_server and hasattr(world_settings,
+                                         "fixed_delta_seconds"):
+            world_settings.fixed_delta_seconds = self._fixed_delta_seconds
         self.world.apply_settings(world_settings)
         # Set the spectatator/server view if rendering is enabled
         if self._render and self._env_config.get("spectator_loc"):
@@ -512,6 +638,8 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         #     if v.is_alive:
         #         v.destroy()
         #     assert (v not in self.world.get_actors())
+        if self._camera_collector is not None:
+            self._camera_collector.remove_all()
         print("Cleaned-up the world...")
 
         self._cameras = {}
@@ -526,6 +654,11 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         print("Clearing Carla server state")
         try:
             if self._client:
+                if self._sync_server:
+                    # Hand the server back in asynchronous mode
+                    world_settings = self.world.get_settings()
+                    world_settings.synchronous_mode = False
+                    self.world.apply_settings(world_settings)
                 self._client = None
         except Exception as e:
             print("Error disconnecting client: {}".format(e))
@@ -536,6 +669,10 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
             live_carla_processes.remove(pgid)
             self._server_port = None
             self._server_process = None
+        self._blueprints = {}
+        # The next server may run another map
+        self._start_transforms = {}
+        self._weather_num = None
 
     def reset(self):
         """Reset the carla world, call _init_server()
@@ -570,11 +707,117 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         Returns:
             N/A
         """
-        for cam in self._cameras.values():
-            surface = cam._surface
-            if surface is not None:
-                self._display.blit(surface, (0, 0))
-            pygame.display.flip()
+        surfaces = {
+            actor_id: cam._surface
+            for actor_id, cam in self._cameras.items()
+            if cam._surface is not None
+        }
+        if not surfaces:
+            return
+        # Tile the cameras (like multi_view_render) & flip once for all.
+        # The poses are (row, col) ordered, hence the (height, width) unit
+        width, height = next(iter(surfaces.values())).get_size()
+        poses, _ = get_surface_poses(
+            len(surfaces), [height, width], surfaces.keys())
+        self._display.blits(
+            blit_sequence=[(surface, (poses[actor_id][1],
+                                      poses[actor_id][0]))
+                           for actor_id, surface in surfaces.items()],
+            doreturn=0)
+        pygame.display.flip()
+
+    def _init_manual_control(self):
+        """Create the pygame window & keyboard controller if not done yet.
+
+        set_mode recreates the window, so it must not be called per step.
+
+        Returns:
+            N/A
+        """
+        if self._keyboard_control is not None:
+            return
+        pygame.init()
+        self._display = pygame.display.set_mode(
+            (800, 600), pygame.HWSURFACE | pygame.DOUBLEBUF)
+        self._clock = pygame.time.Clock()
+        self._keyboard_control = KeyboardControl(self, False)
+        logger.debug('pygame started')
+
+    def _tick(self):
+        """Advance the synchronous mode server by one frame.
+
+        Returns:
+            int: Frame number of the new frame.
+        """
+        self.world.tick()
+        return self.world.wait_for_tick().frame_count
+
+    def _get_start_transform(self, actor_id):
+        """Return the start pose of the actor as a carla.Transform.
+
+        The rotation is taken from the road at the start position unless a
+        yaw is specified. The pose is computed once per scenario & map and
+        reused across resets. Each call returns a new carla.Transform.
+
+        Args:
+            actor_id (str): Actor identifier
+
+        Returns:
+            carla.Transform: Start pose of the actor
+        """
+        pose = self._start_transforms.get(actor_id)
+        if pose is None:
+            loc = carla.Location(
+                x=self._start_pos[actor_id][0],
+                y=self._start_pos[actor_id][1],
+                z=self._start_pos[actor_id][2])
+            rot = self.world.get_map().get_waypoint(
+                loc, project_to_road=True).transform.rotation
+            #: If yaw is provided in addition to (X, Y, Z), set yaw
+            if len(self._start_pos[actor_id]) > 3:
+                rot.yaw = self._start_pos[actor_id][3]
+            # Cache plain values: carla.Transform objects are mutable
+            pose = (loc.x, loc.y, loc.z, rot.pitch, rot.yaw, rot.roll)
+            self._start_transforms[actor_id] = pose
+            self._actor_configs[actor_id]["start_transform"] = \
+                self._new_transform(pose)
+        return self._new_transform(pose)
+
+    @staticmethod
+    def _new_transform(pose):
+        """Return a carla.Transform for a (x, y, z, pitch, yaw, roll) pose"""
+        x, y, z, pitch, yaw, roll = pose
+        return carla.Transform(
+            carla.Location(x=x, y=y, z=z),
+            carla.Rotation(pitch=pitch, yaw=yaw, roll=roll))
+
+    def _get_blueprints(self, actor_type):
+        """Return the blueprints that can be used to spawn `actor_type` actors
+
+        The blueprint library doesn't change for the lifetime of a server, so
+        the (filtered) list is built once per actor type & server.
+
+        Args:
+            actor_type (str): One of "pedestrian", "vehicle_4W", "vehicle_2W"
+
+        Returns:
+            list: carla.ActorBlueprint objects
+        """
+        blueprints = self._blueprints.get(actor_type)
+        if blueprints is None:
+            if actor_type == "pedestrian":
+                blueprints = list(
+                    self.world.get_blueprint_library().filter("walker"))
+            else:
+                # Further filter down to 4 or 2-wheeled vehicles
+                num_wheels = 2 if actor_type == "vehicle_2W" else 4
+                blueprints = [
+                    b for b in self.world.get_blueprint_library().filter(
+                        "vehicle")
+                    if int(b.get_attribute("number_of_wheels")) == num_wheels
+                ]
+            self._blueprints[actor_type] = blueprints
+        return blueprints
 
     def _spawn_new_agent(self, actor_id):
         """Spawn an agent as per the blueprint at the given pose
@@ -597,56 +840,18 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
             # Traffic lights already exist in the world & can't be spawned.
             # Find closest traffic light actor in world.actor_list and return
             from macad_gym.core.controllers import traffic_lights
-            loc = carla.Location(self._start_pos[actor_id][0],
-                                 self._start_pos[actor_id][1],
-                                 self._start_pos[actor_id][2])
-            rot = self.world.get_map().get_waypoint(
-                loc, project_to_road=True).transform.rotation
-            #: If yaw is provided in addition to (X, Y, Z), set yaw
-            if len(self._start_pos[actor_id]) > 3:
-                rot.yaw = self._start_pos[actor_id][3]
-            transform = carla.Transform(loc, rot)
-            self._actor_configs[actor_id]["start_transform"] = transform
+            transform = self._get_start_transform(actor_id)
             tls = traffic_lights.get_tls(self.world, transform, sort=True)
             return tls[0][0]  #: Return the key (carla.TrafficLight object) of
             #: closest match
 
-        if actor_type == "pedestrian":
-            blueprints = self.world.get_blueprint_library().filter("walker")
-
-        elif actor_type == "vehicle_4W":
-            blueprints = self.world.get_blueprint_library().filter("vehicle")
-            # Further filter down to 4-wheeled vehicles
-            blueprints = [
-                b for b in blueprints
-                if int(b.get_attribute("number_of_wheels")) == 4
-            ]
-        elif actor_type == "vehicle_2W":
-            blueprints = self.world.get_blueprint_library().filter("vehicle")
-            # Further filter down to 2-wheeled vehicles
-            blueprints = [
-                b for b in blueprints
-                if int(b.get_attribute("number_of_wheels")) == 2
-            ]
-
-        blueprint = random.choice(blueprints)
-        loc = carla.Location(
-            x=self._start_pos[actor_id][0],
-            y=self._start_pos[actor_id][1],
-            z=self._start_pos[actor_id][2])
-        rot = self.world.get_map().get_waypoint(
-            loc, project_to_road=True).transform.rotation
-        #: If yaw is provided in addition to (X, Y, Z), set yaw
-        if len(self._start_pos[actor_id]) > 3:
-            rot.yaw = self._start_pos[actor_id][3]
-        transform = carla.Transform(loc, rot)
-        self._actor_configs[actor_id]["start_transform"] = transform
+        blueprint = random.choice(self._get_blueprints(actor_type))
+        transform = self._get_start_transform(actor_id)
         vehicle = None
         for retry in range(RETRIES_ON_ERROR - 1):
             vehicle = self.world.try_spawn_actor(blueprint, transform)
             if self._sync_server:
-                self.world.tick()
-                self.world.wait_for_tick()
+                self._tick()
             if vehicle is not None and vehicle.get_location().z > 0.0:
                 break
             # Wait to see if spawn area gets cleared before retrying
@@ -683,6 +888,9 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         """
 
         self._done_dict["__all__"] = False
+        if self._camera_collector is None:
+            self._camera_collector = CameraCollector(
+                self._env_config.get("pin_memory", False))
         if not self.first_reset:
             self._clean_world()
         self.first_reset = False
@@ -694,29 +902,39 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
             if weather_num not in WEATHERS:
                 weather_num = 0
 
-        self.world.set_weather(WEATHERS[weather_num])
-
-        self._weather = [
-            self.world.get_weather().cloudyness,
-            self.world.get_weather().precipitation,
-            self.world.get_weather().precipitation_deposits,
-            self.world.get_weather().wind_intensity
-        ]
+        # Weather only changes when set here, so the snapshot reported in
+        # the measurements is refreshed only when a different one is set
+        if weather_num != self._weather_num:
+            self.world.set_weather(WEATHERS[weather_num])
+            weather = self.world.get_weather()
+            self._weather = [
+                weather.cloudyness, weather.precipitation,
+                weather.precipitation_deposits, weather.wind_intensity
+            ]
+            self._weather_num = weather_num
 
         for actor_id, actor_config in self._actor_configs.items():
+            slot = self._actor_table.id_to_slot[actor_id]
             if self._done_dict.get(actor_id, None) is None or \
-                    actor_id in self._dones:
+                    self._actor_table.is_done(slot):
                 self._done_dict[actor_id] = True
 
             if self._done_dict.get(actor_id, False) is True:
-                if actor_id in self._dones:
-                    self._dones.remove(actor_id)
+                self._actor_table.clear_done(slot)
                 if actor_id in self._collisions:
                     self._collisions[actor_id]._reset()
                 if actor_id in self._lane_invasions:
                     self._lane_invasions[actor_id]._reset()
                 if actor_id in self._path_trackers:
                     self._path_trackers[actor_id].reset()
+                # Start the frame stack afresh with the first image
+                flags = int(self._actor_table.flags[slot])
+                if self._framestack > 1 and self._lazy_frames:
+                    # References to the (immutable) preprocessed images
+                    self._frame_ring[actor_id] = [None] * self._framestack
+                    self._frame_head[actor_id] = None
+                elif self._framestack > 1:
+                    self._frame_ring[actor_id] = None
 
                 # Actor is not present in the simulation. Do a medium reset
                 # by clearing the world and spawning the actor from scratch.
@@ -750,19 +968,18 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
                          self._end_pos[actor_id][2]), self._actors[actor_id])
 
                 # Spawn collision and lane sensors if necessary
-                if actor_config["collision_sensor"] == "on":
+                if flags & ACTOR_FLAG_COLLISION:
                     collision_sensor = CollisionSensor(self._actors[actor_id],
                                                        0)
                     self._collisions.update({actor_id: collision_sensor})
-                if actor_config["lane_sensor"] == "on":
+                if flags & ACTOR_FLAG_LANE:
                     lane_sensor = LaneInvasionSensor(self._actors[actor_id], 0)
                     self._lane_invasions.update({actor_id: lane_sensor})
 
                 # Spawn cameras
-                pygame.font.init()  # for HUD
-                hud = HUD(self._env_config["x_res"], self._env_config["x_res"])
-                camera_manager = CameraManager(self._actors[actor_id], hud)
-                if actor_config["log_images"]:
+                camera_manager = CameraManager(self._actors[actor_id],
+                                               self._cam_hud)
+                if flags & ACTOR_FLAG_LOG_IMAGES:
                     # TODO: The recording option should be part of config
                     # 1: Save to disk during runtime
                     # 2: save to memory first, dump to disk on exit
@@ -771,22 +988,12 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
                 # TODO: Fix the hard-corded 0 id use sensor_type-> "camera"
                 # TODO: Make this consistent with keys
                 # in CameraManger's._sensors
+                self._camera_collector.add_camera(actor_id, camera_manager,
+                                                  actor_config)
                 camera_manager.set_sensor(0, notify=False)
                 assert (camera_manager.sensor.is_listening)
                 self._cameras.update({actor_id: camera_manager})
-
-                self._start_coord.update({
-                    actor_id: [
-                        self._start_pos[actor_id][0] // 100,
-                        self._start_pos[actor_id][1] // 100
-                    ]
-                })
-                self._end_coord.update({
-                    actor_id: [
-                        self._end_pos[actor_id][0] // 100,
-                        self._end_pos[actor_id][1] // 100
-                    ]
-                })
+                self._step_fns[actor_id] = self._compile_step(actor_id)
 
                 print("Actor: {} start_pos_xyz(coordID): {} ({}), "
                       "end_pos_xyz(coordID) {} ({})".format(
@@ -801,36 +1008,44 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         #                              self.actors["car2"].get_transform())
         # traffic_lights.set_tl_state(tls, carla.TrafficLightState.Green)
 
-        for actor_id, cam in self._cameras.items():
-            if self._done_dict.get(actor_id, False) is True:
-                # TODO: Move the initialization value setting
-                # to appropriate place
-                # Set appropriate initial values
-                self._last_reward[actor_id] = None
-                self._total_reward[actor_id] = None
-                self._num_steps[actor_id] = 0
-                py_mt = self._read_observation(actor_id)
-                py_measurement = py_mt
-                self._prev_measurement[actor_id] = py_mt
-
-                actor_config = self._actor_configs[actor_id]
-                # Wait for the sensor (camera) actor to start streaming
-                # Shouldn't take too long
-                while cam.callback_count == 0:
-                    if self._sync_server:
-                        self.world.tick()
-                        self.world.wait_for_tick()
-                    pass
-                if cam.image is None:
-                    print("callback_count:", actor_id, ":", cam.callback_count)
-                image = preprocess_image(cam.image, actor_config)
-                obs = self._encode_obs(actor_id, image, py_measurement)
-                self._obs_dict[actor_id] = obs
+        reset_ids = [
+            actor_id for actor_id in self._cameras.keys()
+            if self._done_dict.get(actor_id, False) is True
+        ]
+        # TODO: Move the initialization value setting
+        # to appropriate place
+        # Set appropriate initial values
+        for actor_id in reset_ids:
+            self._actor_table.reset(self._actor_table.id_to_slot[actor_id])
+            self._meas_templates[actor_id] = self._new_meas_template(actor_id)
+        measurements = self._read_observations(reset_ids)
+        # Wait for the sensor (camera) actors to start streaming. In sync
+        # mode nothing else advances the world, so tick (a bounded number of
+        # times) until all the new cameras produced an image. Then block on
+        # the frame produced by the last tick
+        frame_number = None
+        if self._sync_server:
+            waiting = reset_ids
+            for _ in range(RESET_TICKS):
+                frame_number = self._tick()
+                waiting = self._camera_collector.wait(
+                    waiting, timeout=FIRST_IMAGE_TIMEOUT)
+                if not waiting:
+                    break
+        for actor_id in reset_ids:
+            py_measurement = measurements[actor_id]
+            slot = self._actor_table.id_to_slot[actor_id]
+            self._actor_table.prev_meas[slot] = self._actor_table.meas[slot]
+            image = self._camera_collector.get(
+                actor_id, frame_number, timeout=SENSOR_DATA_TIMEOUT)
+            obs = self._encode_obs(actor_id, image, py_measurement)
+            self._obs_dict[actor_id] = obs
 
         return self._obs_dict
 
     def _load_scenario(self, scenario_parameter):
         self._scenario_map = {}
+        self._start_transforms = {}
         # If config contains a single scenario, then use it,
         # if it's an array of scenarios,randomly choose one and init
         if isinstance(scenario_parameter, dict):
@@ -852,6 +1067,17 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
                     self.pos_coor_map[str(actor["end"])]
             else:
                 self._end_pos[actor_id] = actor["end"]
+            self._end_xy[actor_id] = (float(self._end_pos[actor_id][0]),
+                                      float(self._end_pos[actor_id][1]))
+
+            self._start_coord[actor_id] = [
+                self._start_pos[actor_id][0] // 100,
+                self._start_pos[actor_id][1] // 100
+            ]
+            self._end_coord[actor_id] = [
+                self._end_pos[actor_id][0] // 100,
+                self._end_pos[actor_id][1] // 100
+            ]
 
     def _encode_obs(self, actor_id, image, py_measurements):
         """Encode sensor and measurements into obs based on state-space config.
@@ -864,17 +1090,41 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         Returns:
             obs (dict): properly encoded observation data for each actor
         """
-        assert self._framestack in [1, 2]
-        prev_image = self._prev_image
-        self._prev_image = image
-        if prev_image is None:
-            prev_image = image
-        if self._framestack == 2:
-            # image = np.concatenate([prev_image, image], axis=2)
-            image = np.concatenate([prev_image, image])
-        if not self._actor_configs[actor_id]["send_measurements"]:
+        if self._framestack > 1 and self._lazy_frames:
+            frames = self._frame_ring[actor_id]
+            head = self._frame_head[actor_id]
+            if head is None:
+                # Pad the stack with the first image of the episode
+                frames[:] = [image] * self._framestack
+                head = 0
+            else:
+                frames[head] = image
+            head = (head + 1) % self._framestack
+            self._frame_head[actor_id] = head
+            # The collector hands out a new array per image, so the frames
+            # can be shared with the previous obs without copies
+            image = LazyFrames([frames[i] for i in self._frame_order[head]])
+        elif self._framestack > 1:
+            # Stack from oldest to newest along the image height. The new
+            # stack is built in one pass from the previous one (minus its
+            # oldest image) & the new image, so the returned obs is a new
+            # array that the following steps don't overwrite
+            stack = self._frame_ring[actor_id]
+            if stack is None:
+                # Pad the stack with the first image of the episode
+                stack = np.tile(image, (self._framestack, 1, 1))
+            else:
+                height = image.shape[0]
+                new_stack = np.empty_like(stack)
+                new_stack[:-height] = stack[height:]
+                new_stack[-height:] = image
+                stack = new_stack
+            self._frame_ring[actor_id] = stack
+            image = stack
+        slot = self._actor_table.id_to_slot[actor_id]
+        if not self._actor_table.flags[slot] & ACTOR_FLAG_SEND_MEAS:
             return image
-        obs = (image, COMMAND_ORDINAL[py_measurements["next_command"]], [
+        obs = (image, py_measurements["next_command_id"], [
             py_measurements["forward_speed"],
             py_measurements["distance_to_goal"]
         ])
@@ -932,15 +1182,54 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
             reward_dict = {}
             info_dict = {}
 
-            for actor_id, action in action_dict.items():
-                obs, reward, done, info = self._step(actor_id, action)
+            actor_ids = list(action_dict)
+            actions = []
+            controls = []
+            commands = []
+            for actor_id in actor_ids:
+                action, control, command = self._step_fns[actor_id](
+                    action_dict[actor_id])
+                actions.append(action)
+                controls.append(control)
+                if command is not None:
+                    commands.append(command)
+            if commands:
+                # One round trip for all the actors' controls
+                self._client.apply_batch_sync(commands)
+            # The world ticks once for all the actors. So, apply all the
+            # actions first, tick & then read the resulting snapshot
+            frame_number = self._tick() if self._sync_server else None
+            measurements = self._read_observations(actor_ids)
+            for actor_id, action, control in zip(actor_ids, actions,
+                                                 controls):
+                self._record_action(actor_id, action, control,
+                                    measurements[actor_id])
+            slots = [self._actor_table.id_to_slot[a] for a in actor_ids]
+            rewards = Reward.compute_rewards(
+                self._actor_table.prev_meas[slots],
+                self._actor_table.meas[slots], self._reward_flags[slots])
+            self._actor_table.total_reward[slots] += rewards
+
+            # Terminal states of all the stepped actors in one go
+            meas = self._actor_table.meas[slots]
+            early_terminate = (
+                self._actor_table.flags[slots] & ACTOR_FLAG_EARLY_TERM) != 0
+            dones = ((self._actor_table.num_steps[slots] >
+                      self._scenario_map["max_steps"]) | meas["reached_goal"]
+                     | (early_terminate & collided_mask(meas)))
+
+            for actor_id, reward, done in zip(actor_ids, rewards, dones):
+                obs, reward, done, info = self._step(
+                    actor_id, measurements[actor_id], float(reward),
+                    bool(done), frame_number)
                 obs_dict[actor_id] = obs
                 reward_dict[actor_id] = reward
                 self._done_dict[actor_id] = done
                 if done:
-                    self._dones.add(actor_id)
+                    self._actor_table.mark_done(
+                        self._actor_table.id_to_slot[actor_id])
                 info_dict[actor_id] = info
-            self._done_dict["__all__"] = len(self._dones) == len(self._actors)
+            self._done_dict["__all__"] = self._actor_table.all_done()
             # Find if any actor's config has render=True & render only for
             # that actor. NOTE: with async server stepping, enabling rendering
             # affects the step time & therefore MAX_STEPS needs adjustments
@@ -957,103 +1246,139 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
                   traceback.format_exc())
             self._clear_server_state()
 
-    def _step(self, actor_id, action):
-        """Perform the actual step in the CARLA environment
+    def _compile_step(self, actor_id):
+        """Build the function that applies the actions of `actor_id`
 
-        Applies control to `actor_id` based on `action`, process measurements,
-        compute the rewards and terminal state info (dones).
+        The action space & control mode of an actor are fixed for the whole
+        run, so the per-step branching on them is resolved here once. The
+        branches are composed as closures. (Generating source with exec
+        wouldn't save anything over the closures & is harder to debug)
 
         Args:
             actor_id(str): Actor identifier
-            action: Actions to be executed for the actor.
 
         Returns
-            obs (obs_space): Observation for the actor whose id is actor_id.
-            reward (float): Reward for actor. None for first step
-            done (bool): Done value for actor.
-            info (dict): Info for actor.
+            callable: f(action) that returns the resolved action (the
+                [throttle, steer] of a discrete action), the control for it
+                as a dict (steer, throttle, brake, ...) & the carla command
+                that applies it, to be batched with the other actors'
+                commands. The command is None if the control was applied
+                directly (Eg.: manual/auto control or no batch API)
         """
+        config = self._actor_configs[actor_id]
+        flags = int(self._actor_table.flags[self._actor_table.id_to_slot[
+            actor_id]])
+        actor = self._actors[actor_id]
+        verbose = self._verbose
 
-        if self._discrete_actions:
-            action = DISCRETE_ACTIONS[int(action)]
-        assert len(action) == 2, "Invalid action {}".format(action)
         if self._squash_action_logits:
-            forward = 2 * float(sigmoid(action[0]) - 0.5)
-            throttle = float(np.clip(forward, 0, 1))
-            brake = float(np.abs(np.clip(forward, -1, 0)))
-            steer = 2 * float(sigmoid(action[1]) - 0.5)
+
+            # Scalar min/max clipping. np.clip/np.abs on scalars are far
+            # slower for the 2 values of an action
+            def to_control(action):
+                forward = 2 * (sigmoid(action[0]) - 0.5)
+                throttle = min(max(forward, 0.0), 1.0)
+                brake = abs(max(min(forward, 0.0), -1.0))
+                steer = 2 * (sigmoid(action[1]) - 0.5)
+                return throttle, brake, steer
         else:
-            throttle = float(np.clip(action[0], 0, 0.6))
-            brake = float(np.abs(np.clip(action[0], -1, 0)))
-            steer = float(np.clip(action[1], -1, 1))
-        reverse = False
-        hand_brake = False
-        if self._verbose:
-            print("steer", steer, "throttle", throttle, "brake", brake,
-                  "reverse", reverse)
 
-        config = self._actor_configs[actor_id]
-        if config['manual_control']:
-            clock = pygame.time.Clock()
-            # pygame
-            self._display = pygame.display.set_mode(
-                (800, 600), pygame.HWSURFACE | pygame.DOUBLEBUF)
-            logger.debug('pygame started')
-            controller = KeyboardControl(self, False)
-            controller.actor_id = actor_id
-            controller.parse_events(self, clock)
-            # TODO: Is this _on_render() method necessary? why?
-            self._on_render()
-        elif config["auto_control"]:
-            if getattr(self._actors[actor_id], 'set_autopilot', 0):
-                self._actors[actor_id].set_autopilot()
+            def to_control(action):
+                forward = float(action[0])
+                throttle = min(max(forward, 0.0), 0.6)
+                brake = abs(max(min(forward, 0.0), -1.0))
+                steer = min(max(float(action[1]), -1.0), 1.0)
+                return throttle, brake, steer
+
+        if self._discrete_actions:
+            # Every discrete action maps to a fixed (action, control) pair
+            discrete_controls = {
+                k: (v, to_control(v))
+                for k, v in DISCRETE_ACTIONS.items()
+            }
+
+            def get_control(action):
+                return discrete_controls[int(action)]
         else:
-            # TODO: Planner based on waypoints.
-            # cur_location = self.actor_list[i].get_location()
-            # dst_location = carla.Location(x = self.end_pos[i][0],
-            # y = self.end_pos[i][1], z = self.end_pos[i][2])
-            # cur_map = self.world.get_map()
-            # next_point_transform = get_transform_from_nearest_way_point(
-            # cur_map, cur_location, dst_location)
-            # the point with z = 0, and the default z of cars are 40
-            # next_point_transform.location.z = 40
-            # self.actor_list[i].set_transform(next_point_transform)
-
-            agent_type = config.get("type", "vehicle")
-            # TODO: Add proper support for pedestrian actor according to action
-            # space of ped actors
-            if agent_type == "pedestrian":
-                rotation = self._actors[actor_id].get_transform().rotation
+
+            def get_control(action):
+                assert len(action) == 2, "Invalid action {}".format(action)
+                return action, to_control(action)
+
+        if flags & ACTOR_FLAG_MANUAL_CTRL:
+            self._init_manual_control()
+
+            def apply_control(throttle, brake, steer):
+                controller = self._keyboard_control
+                controller.actor_id = actor_id
+                # Time since the last step scales the keyboard steering
+                self._clock.tick()
+                controller.parse_events(self, self._clock)
+                # TODO: Is this _on_render() method necessary? why?
+                self._on_render()
+        elif flags & ACTOR_FLAG_AUTO_CTRL:
+
+            def apply_control(throttle, brake, steer):
+                if getattr(actor, 'set_autopilot', 0):
+                    actor.set_autopilot()
+        # TODO: Planner based on waypoints. See
+        # get_transform_from_nearest_way_point
+        # TODO: Add proper support for pedestrian actor according to action
+        # space of ped actors
+        elif config.get("type", "vehicle") == "pedestrian":
+            # Reused across steps (the command/apply_control copy it)
+            control = carla.WalkerControl()
+
+            def apply_control(throttle, brake, steer):
+                rotation = actor.get_transform().rotation
                 rotation.yaw += steer * 10.0
                 x_dir = math.cos(math.radians(rotation.yaw))
                 y_dir = math.sin(math.radians(rotation.yaw))
 
-                self._actors[actor_id].apply_control(
-                    carla.WalkerControl(
-                        speed=3.0 * throttle,
-                        direction=carla.Vector3D(x_dir, y_dir, 0.0)))
-
-            # TODO: Change this if different vehicle types (Eg.:vehicle_4W,
-            #  vehicle_2W, etc) have different control APIs
-            elif "vehicle" in agent_type:
-                self._actors[actor_id].apply_control(
-                    carla.VehicleControl(
-                        throttle=throttle,
-                        steer=steer,
-                        brake=brake,
-                        hand_brake=hand_brake,
-                        reverse=reverse))
-        # Asynchronosly (one actor at a time; not all at once in a sync) apply
-        # actor actions & perform a server tick after each actor's apply_action
-        # if running with sync_server steps
-        # NOTE: A distinction is made between "(A)Synchronous Environment" and
-        # "(A)Synchronous (carla) server
-        if self._sync_server:
-            self.world.tick()
-            self.world.wait_for_tick()
+                control.speed = 3.0 * throttle
+                control.direction = carla.Vector3D(x_dir, y_dir, 0.0)
+                if BATCH_COMMANDS:
+                    return carla.command.ApplyWalkerControl(actor.id, control)
+                actor.apply_control(control)
+
+        # TODO: Change this if different vehicle types (Eg.:vehicle_4W,
+        #  vehicle_2W, etc) have different control APIs
+        elif "vehicle" in config.get("type", "vehicle"):
+
+            # Reused across steps (the command/apply_control copy it)
+            control = carla.VehicleControl(hand_brake=False, reverse=False)
+
+            def apply_control(throttle, brake, steer):
+                control.throttle = throttle
+                control.steer = steer
+                control.brake = brake
+                if BATCH_COMMANDS:
+                    return carla.command.ApplyVehicleControl(
+                        actor.id, control)
+                actor.apply_control(control)
+        else:
 
-        # Process observations
-        py_measurements = self._read_observation(actor_id)
+            def apply_control(throttle, brake, steer):
+                pass
+
+        def step_fn(action):
+            action, (throttle, brake, steer) = get_control(action)
+            if verbose:
+                print("steer", steer, "throttle", throttle, "brake", brake,
+                      "reverse", False)
+            command = apply_control(throttle, brake, steer)
+            return action, {
+                "steer": steer,
+                "throttle": throttle,
+                "brake": brake,
+                "reverse": False,
+                "hand_brake": False,
+            }, command
+
+        return step_fn
+
+    def _record_action(self, actor_id, action, control, py_measurements):
+        """Store the action & control applied to `actor_id` in this step"""
         if self._verbose:
             print("Next command", py_measurements["next_command"])
         # Store previous action
@@ -1062,96 +1387,177 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
             py_measurements["action"] = [float(a) for a in action]
         else:
             py_measurements["action"] = action
-        py_measurements["control"] = {
-            "steer": steer,
-            "throttle": throttle,
-            "brake": brake,
-            "reverse": reverse,
-            "hand_brake": hand_brake,
-        }
+        py_measurements["control"] = control
 
-        # Compute reward
-        config = self._actor_configs[actor_id]
-        flag = config["reward_function"]
-        cmpt_reward = Reward()
-        reward = cmpt_reward.compute_reward(self._prev_measurement[actor_id],
-                                            py_measurements, flag)
+    def _step(self, actor_id, py_measurements, reward, done, frame_number):
+        """Finish the step of `actor_id` after the server tick
+
+        Updates the episode state of the actor with its `reward` & terminal
+        state (`done`) & encodes the observation.
+
+        Args:
+            actor_id(str): Actor identifier
+            py_measurements (dict): Measurements of the actor after the tick
+            reward (float): Reward of the actor for this step
+            done (bool): Whether the episode of the actor is over
+            frame_number (int): Frame of the tick. None when async.
+
+        Returns
+            obs (obs_space): Observation for the actor whose id is actor_id.
+            reward (float): Reward for actor. None for first step
+            done (bool): Done value for actor.
+            info (dict): Info for actor.
+        """
+        slot = self._actor_table.id_to_slot[actor_id]
+        flags = int(self._actor_table.flags[slot])
 
         self._previous_rewards[actor_id] = reward
-        if self._total_reward[actor_id] is None:
-            self._total_reward[actor_id] = reward
-        else:
-            self._total_reward[actor_id] += reward
 
         py_measurements["reward"] = reward
-        py_measurements["total_reward"] = self._total_reward[actor_id]
-        done = (self._num_steps[actor_id] > self._scenario_map["max_steps"]
-                or py_measurements["next_command"] == "REACH_GOAL"
-                or (config["early_terminate_on_collision"]
-                    and collided_done(py_measurements)))
+        py_measurements["total_reward"] = float(
+            self._actor_table.total_reward[slot])
         py_measurements["done"] = done
 
-        self._prev_measurement[actor_id] = py_measurements
-        self._num_steps[actor_id] += 1
+        self._actor_table.prev_meas[slot] = self._actor_table.meas[slot]
+        self._actor_table.num_steps[slot] += 1
 
-        if config["log_measurements"] and CARLA_OUT_PATH:
-            # Write out measurements to file
+        if flags & ACTOR_FLAG_LOG_MEAS and CARLA_OUT_PATH:
+            # Write out measurements to file. The file I/O happens on the
+            # log writer's thread
             if not self._measurements_file_dict[actor_id]:
-                self._measurements_file_dict[actor_id] = open(
-                    os.path.join(
-                        CARLA_OUT_PATH, "measurements_{}.json".format(
-                            self._episode_id_dict[actor_id])), "w")
-            self._measurements_file_dict[actor_id].\
-                write(json.dumps(py_measurements))
-            self._measurements_file_dict[actor_id].write("\n")
+                self._measurements_file_dict[actor_id] = os.path.join(
+                    CARLA_OUT_PATH, "measurements_{}.json".format(
+                        self._episode_id_dict[actor_id]))
+            if self._log_writer is None:
+                self._log_writer = LogWriter()
+            self._log_writer.write(
+                self._measurements_file_dict[actor_id],
+                encode_json_line(py_measurements))
             if done:
-                self._measurements_file_dict[actor_id].close()
+                self._log_writer.close_file(
+                    self._measurements_file_dict[actor_id])
                 self._measurements_file_dict[actor_id] = None
                 # if self.config["convert_images_to_video"] and\
                 #  (not self.video):
                 #    self.images_to_video()
                 #    self.video = Trueseg_city_space
 
-        original_image = self._cameras[actor_id].image
-        config = self._actor_configs[actor_id]
-        image = preprocess_image(original_image, config)
+        # Join on the camera image of this tick. It was preprocessed in the
+        # background while the measurements & reward were computed
+        image = self._camera_collector.get(
+            actor_id, frame_number, timeout=SENSOR_DATA_TIMEOUT)
 
         return (self._encode_obs(actor_id, image, py_measurements), reward,
                 done, py_measurements)
 
-    def _read_observation(self, actor_id):
-        """Read observation and return measurement.
+    def _read_observations(self, actor_ids):
+        """Read the observations of `actor_ids` from the same world snapshot.
+
+        Args:
+            actor_ids (list): Actor identifiers (str)
+
+        Returns:
+            dict: measurement data (dict) of each actor.
+
+        """
+        if not actor_ids:
+            return {}
+        measurements = {}
+        for actor_id in actor_ids:
+            actor = self._actors[actor_id]
+            transform = actor.get_transform()
+            # A handful of actors: scalar math beats building numpy arrays
+            end_x, end_y = self._end_xy[actor_id]
+            location = transform.location
+            measurements[actor_id] = self._read_observation(
+                actor_id, transform, actor.get_velocity().x,
+                math.hypot(location.x - end_x, location.y - end_y))
+        return measurements
+
+    def _new_meas_template(self, actor_id):
+        """Measurements dict of `actor_id` for a new episode.
+
+        The fields that don't change during the episode are filled in. The
+        others are placeholders (None), so that the keys keep their order.
 
         Args:
             actor_id (str): Actor identifier
 
+        Returns:
+            dict: measurement data template.
+        """
+        return {
+            "episode_id": self._episode_id_dict[actor_id],
+            "step": None,
+            "x": None,
+            "y": None,
+            "pitch": None,
+            "yaw": None,
+            "roll": None,
+            "forward_speed": None,
+            "distance_to_goal": None,
+            "distance_to_goal_euclidean": None,
+            "collision_vehicles": None,
+            "collision_pedestrians": None,
+            "collision_other": None,
+            "intersection_offroad": None,
+            "intersection_otherlane": None,
+            "weather": self._weather,
+            "map": self._server_map,
+            "start_coord": self._start_coord[actor_id],
+            "end_coord": self._end_coord[actor_id],
+            "current_scenario": self._scenario_map,
+            "x_res": self._x_res,
+            "y_res": self._y_res,
+            "max_steps": self._scenario_map["max_steps"],
+            "next_command": None,
+            "next_command_id": None,
+            "previous_action": None,
+            "previous_reward": None
+        }
+
+    def _read_observation(self, actor_id, transform, forward_speed,
+                          distance_to_goal_euclidean):
+        """Build the measurement of `actor_id` from its (batched) readings.
+
+        Args:
+            actor_id (str): Actor identifier
+            transform (carla.Transform): Current transform of the actor
+            forward_speed (float): Current forward speed of the actor
+            distance_to_goal_euclidean (float): Straight line distance to the
+                end position of the actor
+
         Returns:
             dict: measurement data.
 
         """
-        cur = self._actors[actor_id]
+        # The readings are a snapshot. Reuse them instead of more RPCs
+        location = transform.location
+        rotation = transform.rotation
+        x, y = location.x, location.y
         cur_config = self._actor_configs[actor_id]
         planner_enabled = cur_config["enable_planner"]
         if planner_enabled:
-            dist = self._path_trackers[actor_id].get_distance_to_end()
-            orientation_diff = self._path_trackers[actor_id].\
-                get_orientation_difference_to_end_in_radians()
-            commands = self.planner.plan_route(
-                (cur.get_location().x, cur.get_location().y),
-                (self._end_pos[actor_id][0], self._end_pos[actor_id][1]))
-            if len(commands) > 0:
-                next_command = ROAD_OPTION_TO_COMMANDS_MAPPING.get(
-                    commands[0], "LANE_FOLLOW")
+            path_tracker = self._path_trackers[actor_id]
+            dist = path_tracker.get_distance_to_end(location)
+            orientation_diff = path_tracker.\
+                get_orientation_difference_to_end_in_radians(rotation.yaw)
+            # Project onto the path planned at reset instead of re-planning
+            next_turn = path_tracker.get_next_turn((x, y, location.z))
+            if next_turn is not None:
+                next_command_id = ROAD_OPTION_TO_ORDINAL.get(
+                    next_turn, COMMAND_ORDINAL["LANE_FOLLOW"])
             elif dist <= DISTANCE_TO_GOAL_THRESHOLD and \
                     orientation_diff <= ORIENTATION_TO_GOAL_THRESHOLD:
-                next_command = "REACH_GOAL"
+                next_command_id = COMMAND_ORDINAL["REACH_GOAL"]
             else:
-                next_command = "LANE_FOLLOW"
+                next_command_id = COMMAND_ORDINAL["LANE_FOLLOW"]
 
             # DEBUG
             # self.path_trackers[actor_id].draw()
         else:
-            next_command = "LANE_FOLLOW"
+            next_command_id = COMMAND_ORDINAL["LANE_FOLLOW"]
+        next_command = COMMAND_NAMES[next_command_id]
 
         collision_vehicles = self._collisions[actor_id].collision_vehicles
         collision_pedestrians = self._collisions[
@@ -1163,47 +1569,44 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         if next_command == "REACH_GOAL":
             distance_to_goal = 0.0
         elif planner_enabled:
-            distance_to_goal = self._path_trackers[actor_id].\
-                                   get_distance_to_end()
+            distance_to_goal = dist
         else:
             distance_to_goal = -1
 
-        distance_to_goal_euclidean = float(
-            np.linalg.norm([
-                self._actors[actor_id].get_location().x -
-                self._end_pos[actor_id][0],
-                self._actors[actor_id].get_location().y -
-                self._end_pos[actor_id][1]
-            ]))
-
-        py_measurements = {
-            "episode_id": self._episode_id_dict[actor_id],
-            "step": self._num_steps[actor_id],
-            "x": self._actors[actor_id].get_location().x,
-            "y": self._actors[actor_id].get_location().y,
-            "pitch": self._actors[actor_id].get_transform().rotation.pitch,
-            "yaw": self._actors[actor_id].get_transform().rotation.yaw,
-            "roll": self._actors[actor_id].get_transform().rotation.roll,
-            "forward_speed": self._actors[actor_id].get_velocity().x,
-            "distance_to_goal": distance_to_goal,
-            "distance_to_goal_euclidean": distance_to_goal_euclidean,
-            "collision_vehicles": collision_vehicles,
-            "collision_pedestrians": collision_pedestrians,
-            "collision_other": collision_other,
-            "intersection_offroad": intersection_offroad,
-            "intersection_otherlane": intersection_otherlane,
-            "weather": self._weather,
-            "map": self._server_map,
-            "start_coord": self._start_coord[actor_id],
-            "end_coord": self._end_coord[actor_id],
-            "current_scenario": self._scenario_map,
-            "x_res": self._x_res,
-            "y_res": self._y_res,
-            "max_steps": self._scenario_map["max_steps"],
-            "next_command": next_command,
-            "previous_action": self._previous_actions.get(actor_id, None),
-            "previous_reward": self._previous_rewards.get(actor_id, None)
-        }
+        # The numeric measurements used for the reward & done computations.
+        # Filled in place (in MEAS_DTYPE field order)
+        slot = self._actor_table.id_to_slot[actor_id]
+        self._actor_table.meas[slot] = (
+            x, y, rotation.pitch, rotation.yaw, rotation.roll, forward_speed,
+            distance_to_goal, distance_to_goal_euclidean, collision_vehicles,
+            collision_pedestrians, collision_other, intersection_offroad,
+            intersection_otherlane, next_command_id,
+            next_command_id == COMMAND_ORDINAL["REACH_GOAL"])
+
+        # Also returned as the info of the actor. A new (shallow) copy each
+        # step, as the callers may hold on to the previous infos
+        py_measurements = self._meas_templates[actor_id].copy()
+        py_measurements["step"] = int(self._actor_table.num_steps[slot])
+        py_measurements["x"] = x
+        py_measurements["y"] = y
+        py_measurements["pitch"] = rotation.pitch
+        py_measurements["yaw"] = rotation.yaw
+        py_measurements["roll"] = rotation.roll
+        py_measurements["forward_speed"] = forward_speed
+        py_measurements["distance_to_goal"] = distance_to_goal
+        py_measurements["distance_to_goal_euclidean"] = \
+            distance_to_goal_euclidean
+        py_measurements["collision_vehicles"] = collision_vehicles
+        py_measurements["collision_pedestrians"] = collision_pedestrians
+        py_measurements["collision_other"] = collision_other
+        py_measurements["intersection_offroad"] = intersection_offroad
+        py_measurements["intersection_otherlane"] = intersection_otherlane
+        py_measurements["next_command"] = next_command
+        py_measurements["next_command_id"] = next_command_id
+        py_measurements["previous_action"] = self._previous_actions.get(
+            actor_id, None)
+        py_measurements["previous_reward"] = self._previous_rewards.get(
+            actor_id, None)
 
         return py_measurements
 
@@ -1211,6 +1614,12 @@ class MultiCarlaEnv(*MultiAgentEnvBases):
         """Clean-up the world, clear server state & close the Env"""
         self._clean_world()
         self._clear_server_state()
+        if self._camera_collector is not None:
+            self._camera_collector.stop()
+            self._camera_collector = None
+        if self._log_writer is not None:
+            self._log_writer.stop()
+            self._log_writer = None
 
 
 def print_measurements(measurements):
@@ -1236,18 +1645,42 @@ def print_measurements(measurements):
 
 
 def sigmoid(x):
+    # Scalar math instead of numpy. Each branch only exponentiates a
+    # non-positive value, so it can't overflow
     x = float(x)
-    return np.exp(x) / (1 + np.exp(x))
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
 
 
 def collided_done(py_measurements):
-    """Define the main episode termination criteria"""
+    """Define the main episode termination criteria
+
+    Args:
+        py_measurements: Measurements (dict or MEAS_DTYPE row) of an actor
+    """
     m = py_measurements
     collided = (m["collision_vehicles"] > 0 or m["collision_pedestrians"] > 0
                 or m["collision_other"] > 0)
     return bool(collided)  # or m["total_reward"] < -100)
 
 
+def collided_mask(measurements):
+    """Vectorized `collided_done` for a batch of actors.
+
+    Args:
+        measurements (numpy.ndarray): (N,) measurements (structured array.
+            See actor_table.MEAS_DTYPE).
+
+    Returns:
+        numpy.ndarray: (N,) bool. Whether each actor has collided.
+    """
+    m = measurements
+    return ((m["collision_vehicles"] > 0) | (m["collision_pedestrians"] > 0)
+            | (m["collision_other"] > 0))
+
+
 def get_next_actions(measurements, is_discrete_actions):
     """Get/Update next action, work with way_point based planner.
 
@@ -1256,26 +1689,15 @@ def get_next_actions(measurements, is_discrete_actions):
         is_discrete_actions (bool): whether use discrete actions
 
     Returns:
-        dict: action_dict, dict of len-two integer lists.
+        dict: action_dict. Discrete action (int) or len-two (throttle,
+            steer) tuple for each actor.
     """
-    action_dict = {}
-    for actor_id, meas in measurements.items():
-        m = meas
-        command = m["next_command"]
-        if command == "REACH_GOAL":
-            action_dict[actor_id] = 0
-        elif command == "GO_STRAIGHT":
-            action_dict[actor_id] = 3
-        elif command == "TURN_RIGHT":
-            action_dict[actor_id] = 6
-        elif command == "TURN_LEFT":
-            action_dict[actor_id] = 5
-        elif command == "LANE_FOLLOW":
-            action_dict[actor_id] = 3
-        # Test for discrete actions:
-        if not is_discrete_actions:
-            action_dict[actor_id] = [1, 0]
-    return action_dict
+    if not is_discrete_actions:
+        return dict.fromkeys(measurements, CONTINUOUS_FORWARD_ACTION)
+    return {
+        actor_id: COMMAND_TO_DISCRETE_ACTION.get(meas["next_command"], 0)
+        for actor_id, meas in measurements.items()
+    }
 
 
 if __name__ == "__main__":
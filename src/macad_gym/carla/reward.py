@@ -85,5 +85,55 @@ class Reward(object):
 
         return self.reward
 
+    @staticmethod
+    def compute_rewards(prev_measurements, curr_measurements, flags):
+        """Vectorized `compute_reward` for a batch of actors.
+
+        Args:
+            prev_measurements (numpy.ndarray): (N,) previous measurements
+                (structured array. See actor_table.MEAS_DTYPE).
+            curr_measurements (numpy.ndarray): (N,) current measurements.
+            flags (list): Reward function (str) of each actor.
+
+        Returns:
+            numpy.ndarray: (N,) rewards, in the same order as the inputs.
+        """
+
+        def damage(measurements):
+            return (measurements["collision_vehicles"] +
+                    measurements["collision_pedestrians"] +
+                    measurements["collision_other"])
+
+        flags = np.asarray(flags, dtype=str)
+        unknown = set(flags) - {"corl2017", "lane_keep", "custom"}
+        if unknown:
+            raise ValueError("Unknown reward function(s): {}".format(unknown))
+
+        prev, curr = prev_measurements, curr_measurements
+        cur_speed = curr["forward_speed"]
+        prev_speed = prev["forward_speed"]
+        new_damage = damage(curr) - damage(prev)
+        offroad = curr["intersection_offroad"]
+        otherlane = curr["intersection_otherlane"]
+        prev_offroad = prev["intersection_offroad"]
+        prev_otherlane = prev["intersection_otherlane"]
+
+        progress = np.clip(prev["distance_to_goal"] - curr["distance_to_goal"],
+                           -10.0, 10.0)
+        speed = np.clip(cur_speed, 0.0, 30.0) / 10
+        crashed = 100.0 * (new_damage != 0)
+
+        rewards = np.empty(len(flags), dtype=np.float64)
+        mask = flags == "corl2017"
+        rewards[mask] = (progress + 0.05 * (cur_speed - prev_speed) -
+                         .00002 * new_damage - 2 * (offroad - prev_offroad) -
+                         2 * (otherlane - prev_otherlane))[mask]
+        mask = flags == "lane_keep"
+        rewards[mask] = (speed - crashed - offroad - otherlane)[mask]
+        mask = flags == "custom"
+        rewards[mask] = (progress + speed - crashed - offroad * 0.05 -
+                         otherlane * 0.05 + 100 * curr["reached_goal"])[mask]
+        return rewards
+
     def destory(self):
         pass
@@ -28,18 +28,10 @@ from __future__ import print_function
 # -- find carla module ---------------------------------------------------------
 # ==============================================================================
 
-import glob
-import os
-import sys
+from macad_gym.core.carla_egg import add_carla_egg_to_path
 
-try:
-    sys.path.append(
-        glob.glob('env/carla/**/**/carla-*%d.%d-%s.egg' %
-                  (sys.version_info.major, sys.version_info.minor,
-                   'win-amd64' if os.name == 'nt' else 'linux-x86_64'))[0])
-except IndexError:
+if add_carla_egg_to_path('env/carla/*/*/carla-*') is None:
     print("IndexErr loading egg")
-    pass
 
 # ==============================================================================
 # -- imports -------------------------------------------------------------------
@@ -0,0 +1,58 @@
+"""
+carla_egg.py: Locate the CARLA PythonAPI egg. Must not import carla
+"""
+import glob
+import os
+import sys
+
+# Default path of the CARLA server launch script
+DEFAULT_CARLA_SERVER = os.path.expanduser("~/software/CARLA_0.9.4/CarlaUE4.sh")
+
+
+def find_carla_egg(fallback_glob=None):
+    """Return the path of the CARLA PythonAPI egg for this python or None
+
+    Lists $CARLA_ROOT/PythonAPI/carla/dist (by default, the directory of
+    $CARLA_SERVER) instead of globbing directory trees.
+
+    Args:
+        fallback_glob (str): Optional glob pattern (without the egg's
+            python version & platform suffix) tried if the egg isn't found
+            under CARLA_ROOT.
+
+    Returns:
+        str: Path of the egg. None if not found.
+    """
+    suffix = '%d.%d-%s.egg' % (sys.version_info.major, sys.version_info.minor,
+                               'win-amd64'
+                               if os.name == 'nt' else 'linux-x86_64')
+    carla_root = os.environ.get(
+        "CARLA_ROOT",
+        os.path.dirname(os.environ.get("CARLA_SERVER", DEFAULT_CARLA_SERVER)))
+    dist = os.path.join(carla_root, "PythonAPI", "carla", "dist")
+    try:
+        names = os.listdir(dist)
+    except OSError:
+        names = []
+    for name in names:
+        if name.startswith("carla-") and name.endswith(suffix):
+            return os.path.join(dist, name)
+    if fallback_glob is None:
+        return None
+    eggs = glob.glob(fallback_glob + suffix)
+    return eggs[0] if eggs else None
+
+
+def add_carla_egg_to_path(fallback_glob=None):
+    """Append the egg found by `find_carla_egg` to sys.path, if any
+
+    Args:
+        fallback_glob (str): See `find_carla_egg`.
+
+    Returns:
+        str: Path of the egg. None if not found.
+    """
+    egg = find_carla_egg(fallback_glob)
+    if egg is not None:
+        sys.path.append(egg)
+    return egg
@@ -0,0 +1,65 @@
+"""
+lazy_frames.py: Framestacked observation that shares frames across steps
+"""
+
+import numpy as np
+
+
+class LazyFrames(object):
+    """Stack of frames that is only concatenated when used as an array.
+
+    Consecutive framestacked observations have all but one frame in common.
+    Holding references to the frames instead of a concatenated copy lets
+    those frames be shared by all the observations (Eg.: in a replay buffer)
+    that contain them. The frames must not be modified after they are added.
+
+    Example:
+        >>> obs = LazyFrames([frame0, frame1])
+        >>> np.asarray(obs).shape  # Stacked along the first (height) axis
+        (168, 84, 3)
+    """
+
+    def __init__(self, frames):
+        """
+        Args:
+            frames (list): numpy.ndarray frames, from oldest to newest.
+        """
+        self._frames = frames
+        self._out = None
+
+    def _force(self):
+        if self._out is None:
+            self._out = np.concatenate(self._frames, axis=0)
+            # The concatenated copy supersedes the references
+            self._frames = None
+        return self._out
+
+    def __array__(self, dtype=None, copy=None):
+        out = self._force()
+        if dtype is not None and out.dtype != dtype:
+            if copy is False:
+                raise ValueError("Converting LazyFrames of {} to {} "
+                                 "requires a copy".format(out.dtype, dtype))
+            return out.astype(dtype)
+        if copy:
+            return out.copy()
+        return out
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, i):
+        return self._force()[i]
+
+    @property
+    def shape(self):
+        if self._out is not None:
+            return self._out.shape
+        return (sum(frame.shape[0] for frame in self._frames), ) + \
+            self._frames[0].shape[1:]
+
+    @property
+    def dtype(self):
+        if self._out is not None:
+            return self._out.dtype
+        return self._frames[0].dtype
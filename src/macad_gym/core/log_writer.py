@@ -0,0 +1,76 @@
+"""
+log_writer.py: Background writer for the measurement logs
+"""
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LogWriter(object):
+    """Appends lines to log files on a daemon thread.
+
+    `write` only enqueues the line so that the env step doesn't wait on the
+    disk. The queue is bounded: if the disk can't keep up, `write` blocks
+    instead of letting the backlog grow without bounds.
+    """
+
+    def __init__(self, maxsize=256, buffering=1 << 20):
+        """
+        Args:
+            maxsize (int): Max. number of pending lines.
+            buffering (int): Size of the write buffer of each file in bytes.
+        """
+        self._buffering = buffering
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._files = {}
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, path, line):
+        """Append `line` to the file at `path`.
+
+        The file is (re)created by the first write after it was opened or
+        closed.
+
+        Args:
+            path (str): Path of the log file.
+            line (bytes): Data to append. Including the newline, if any.
+
+        Returns:
+            N/A.
+        """
+        self._queue.put((path, line))
+
+    def close_file(self, path):
+        """Close the file at `path` once the pending lines are written"""
+        self._queue.put((path, None))
+
+    def stop(self):
+        """Write the pending lines, close all the files & stop the thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            path, line = item
+            try:
+                if line is None:
+                    log_file = self._files.pop(path, None)
+                    if log_file is not None:
+                        log_file.close()
+                    continue
+                log_file = self._files.get(path)
+                if log_file is None:
+                    log_file = self._files[path] = open(
+                        path, "wb", buffering=self._buffering)
+                log_file.write(line)
+            except OSError:
+                logger.exception("Failed to write to %s", path)
+        for log_file in self._files.values():
+            log_file.close()
+        self._files = {}
@@ -9,6 +9,9 @@ from macad_gym.carla.PythonAPI.agents.navigation.local_planner import \
     RoadOption  # noqa: E402
 from macad_gym.carla.PythonAPI.agents.tools.misc import vector  # noqa: E402
 
+# Max. distance (m) from the cached path before it is re-planned
+PATH_DEVIATION_TOLERANCE = 5.0
+
 
 def get_shortest_path_distance(world, planner, origin, destination):
     """
@@ -278,26 +281,38 @@ class PathTracker(object):
         self.actor = actor
         self.path = []
         self.path_index = 0
-        self.generate_path()
+        self._path_xy = np.zeros((0, 2))
+        self._next_turn = np.zeros(0, dtype=np.int64)
+        # Whether the path was re-planned from off the origin's path
+        self._replanned = False
         self.last_location = None
         self.distance_cache = 0.0
+        self.generate_path()
 
-    def generate_path(self):
-        self.last_location = None
+    def generate_path(self, start=None):
+        """Plan the path to the destination.
+
+        Args:
+            start (tuple): Start (x, y, z) of the path. Defaults to the
+                origin. `origin` itself is left unchanged.
+        """
         self.set_path(
             get_shortest_path_waypoints(
-                self.world, self.planner, self.origin,
+                self.world, self.planner,
+                self.origin if start is None else start,
                 get_next_waypoint(self.world, self.destination)))
-        self.path_index = 0
+        self._replanned = start is not None
 
-    def advance_path(self):
+    def advance_path(self, location=None):
         if self.path_index < len(self.path):
+            if location is None:
+                location = self.actor.get_location()
             last_dist = self.path[self.path_index][0].transform.location.\
-                distance(self.actor.get_location())
+                distance(location)
 
             for i in range(self.path_index + 1, len(self.path)):
                 dist = self.path[i][0].transform.location.\
-                    distance(self.actor.get_location())
+                    distance(location)
                 if dist <= last_dist:
                     self.path_index = i
                 else:
@@ -318,11 +333,18 @@ class PathTracker(object):
 
             self.path_index = close_i
 
-    def get_distance_to_end(self):
-        last_loc = self.actor.get_location()
+    def get_distance_to_end(self, location=None):
+        """Path distance from the actor to the end of the path
+
+        Args:
+            location (carla.Location): Current location of the actor, if
+                already known. Saves a server round trip.
+        """
+        last_loc = self.actor.get_location() if location is None \
+            else location
         if self.last_location is None or \
                 self.last_location.distance(last_loc) >= 0.5:
-            self.advance_path()
+            self.advance_path(last_loc)
             self.last_location = last_loc
         else:
             return self.distance_cache
@@ -330,8 +352,7 @@ class PathTracker(object):
         if self.path_index < len(self.path):
             node_coords = (self.path[self.path_index][0].transform.location.x,
                            self.path[self.path_index][0].transform.location.y)
-            actor_coords = self.actor.get_location()
-            actor_coords = (actor_coords.x, actor_coords.y)
+            actor_coords = (last_loc.x, last_loc.y)
             distance = self.planner.distance(node_coords, actor_coords)
 
             for i in range(self.path_index + 1, len(self.path)):
@@ -355,11 +376,12 @@ class PathTracker(object):
             return self.planner.distance(node_coords, actor_coords)
         return 9999.0
 
-    def get_orientation_difference_to_end_in_radians(self):
+    def get_orientation_difference_to_end_in_radians(self, yaw=None):
         if len(self.path) > 0:
+            if yaw is None:
+                yaw = self.actor.get_transform().rotation.yaw
             return math.radians(
-                math.fabs(self.actor.get_transform().rotation.yaw -
-                          self.path[-1][0].transform.rotation.yaw))
+                math.fabs(yaw - self.path[-1][0].transform.rotation.yaw))
         return math.pi
 
     def draw(self):
@@ -384,11 +406,58 @@ class PathTracker(object):
                     color=carla.Color(0, 255, 0),
                     thickness=0.5)
 
+    def get_next_turn(self, location, tolerance=PATH_DEVIATION_TOLERANCE):
+        """Return the next turn on the cached path ahead of `location`
+
+        `location` is projected onto the nearest waypoint of the path. The
+        path is only re-planned (from `location`) if it is farther than
+        `tolerance` from the path.
+
+        Args:
+            location (tuple): Current (x, y, z) position of the actor
+            tolerance (float): Max. deviation from the path in meters
+
+        Returns:
+            RoadOption: The next STRAIGHT/LEFT/RIGHT decision. None if there
+                are no more turns before the end of the path.
+        """
+        if len(self.path) == 0:
+            return None
+        dists = np.linalg.norm(self._path_xy - location[:2], axis=1)
+        index = int(dists.argmin())
+        if dists[index] > tolerance:
+            self.generate_path(tuple(location))
+            if len(self.path) == 0:
+                return None
+            index = int(
+                np.linalg.norm(self._path_xy - location[:2], axis=1).argmin())
+        turn = self._next_turn[index]
+        return self.path[turn][1] if turn >= 0 else None
+
     def reset(self):
-        self.path_index = 0
+        if self._replanned:
+            self.generate_path()
+        else:
+            self.path_index = 0
+            self.last_location = None
 
     def set_path(self, path):
+        """Follow `path` from its start. Resets the progress along the path"""
         self.path = path
+        self.path_index = 0
+        self.last_location = None
+        self.distance_cache = 0.0
+        self._path_xy = np.array(
+            [[p[0].transform.location.x, p[0].transform.location.y]
+             for p in path]).reshape((-1, 2))
+        # Index of the first turn at/after each waypoint of the path. -1 if
+        # there are no more turns
+        self._next_turn = np.full(len(path), -1, dtype=np.int64)
+        next_turn = -1
+        for i in range(len(path) - 1, -1, -1):
+            if path[i][1] != RoadOption.LANEFOLLOW:
+                next_turn = i
+            self._next_turn[i] = next_turn
         # self.path = []
 
         # for p in path:
@@ -7,8 +7,17 @@ import carla
 from carla import ColorConverter as cc
 
 CARLA_OUT_PATH = os.environ.get("CARLA_OUT", os.path.expanduser("~/carla_out"))
-if CARLA_OUT_PATH and not os.path.exists(CARLA_OUT_PATH):
-    os.makedirs(CARLA_OUT_PATH)
+if CARLA_OUT_PATH:
+    os.makedirs(CARLA_OUT_PATH, exist_ok=True)
+
+
+# TODO: Make the camera positioning configurable. Toggling is already
+# supported through toggle_camera
+# Camera mounts relative to the parent actor, shared by all the cameras
+CAMERA_TRANSFORMS = (
+    carla.Transform(carla.Location(x=1.6, z=1.7)),
+    carla.Transform(carla.Location(x=-5.5, z=2.8), carla.Rotation(pitch=-15)),
+)
 
 
 class CameraManager(object):
@@ -17,6 +26,9 @@ class CameraManager(object):
 
     def __init__(self, parent_actor, hud):
         self.image = None  # need image to encode obs.
+        #: Optional callable invoked with every new image (on the sensor's
+        #: callback thread)
+        self.on_image = None
         self.image_list = []  # for save images later.
         self.sensor = None
         self._surface = None
@@ -24,13 +36,7 @@ class CameraManager(object):
         self._hud = hud
         self._recording = False
         self._memory_record = False
-        # TODO: Make the camera positioning configurable. Toggling is already
-        # supported through toggle_camera
-        self._camera_transforms = [
-            carla.Transform(carla.Location(x=1.6, z=1.7)),
-            carla.Transform(
-                carla.Location(x=-5.5, z=2.8), carla.Rotation(pitch=-15))
-        ]
+        self._camera_transforms = CAMERA_TRANSFORMS
         # 0 is dashcam view; 1 is tethered view
         self._transform_index = 0
         self._sensors = [
@@ -133,6 +139,8 @@ class CameraManager(object):
         self.callback_count += 1
         if not self:
             return
+        if self.on_image is not None:
+            self.on_image(image)
         if self._sensors[self._index][0].startswith('sensor.lidar'):
             points = np.frombuffer(image.raw_data, dtype=np.dtype('f4'))
             points = np.reshape(points, (int(points.shape[0] / 3), 3))
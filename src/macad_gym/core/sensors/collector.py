@@ -0,0 +1,145 @@
+"""
+collector.py: Background preprocessing of the camera images of all actors
+"""
+import logging
+import queue
+import threading
+
+from macad_gym.core.sensors.utils import image_buffer, preprocess_image
+
+logger = logging.getLogger(__name__)
+
+
+class CameraCollector(object):
+    """Preprocesses the images of all the registered cameras on one thread.
+
+    The CameraManager callbacks only enqueue the raw `carla.Image`. A daemon
+    thread decodes & preprocesses them as they arrive so that this work
+    overlaps with the rest of the env step. Consumers call `get` once per
+    server tick to join on the frame they need.
+
+    Each image is preprocessed into a new (aligned or pinned) array, as the
+    arrays are handed out in the observations.
+    """
+
+    def __init__(self, pin_memory=False):
+        """
+        Args:
+            pin_memory (bool): Preprocess into page-locked host memory. See
+                `image_buffer`.
+        """
+        self._pin_memory = pin_memory
+        self._queue = queue.Queue()
+        self._configs = {}
+        #: actor_id: (frame_number, preprocessed image)
+        self._latest = {}
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add_camera(self, actor_id, camera_manager, actor_config):
+        """Preprocess the images of `camera_manager` as per `actor_config`
+
+        Args:
+            actor_id (str): Actor identifier the camera is attached to.
+            camera_manager (CameraManager): Camera of the actor.
+            actor_config (dict): Configuration of the actor.
+
+        Returns:
+            N/A.
+        """
+        with self._cond:
+            self._configs[actor_id] = actor_config
+            self._latest.pop(actor_id, None)
+        camera_manager.on_image = \
+            lambda image: self._queue.put((actor_id, image))
+
+    def remove_all(self):
+        """Stop tracking all cameras (Eg.: Before the actors are destroyed)"""
+        with self._cond:
+            self._configs = {}
+            self._latest = {}
+
+    def wait(self, actor_ids, timeout=None):
+        """Wait until there's an image of each of `actor_ids`.
+
+        Args:
+            actor_ids (list): Actor identifiers.
+            timeout (float): Max. number of seconds to wait.
+
+        Returns:
+            list: The actor ids that still have no image. Empty if all have.
+        """
+
+        def missing():
+            return [a for a in actor_ids if a not in self._latest]
+
+        with self._cond:
+            self._cond.wait_for(lambda: not missing(), timeout)
+            return missing()
+
+    def get(self, actor_id, frame_number=None, timeout=None):
+        """Wait for & return the preprocessed image of `actor_id`.
+
+        Args:
+            actor_id (str): Actor identifier.
+            frame_number (int): Oldest acceptable frame. If None, any frame
+                will do.
+            timeout (float): Max. number of seconds to wait.
+
+        Returns:
+            numpy.ndarray: Preprocessed image.
+
+        Raises:
+            RuntimeError: If no suitable image arrived within `timeout`.
+        """
+
+        def ready():
+            latest = self._latest.get(actor_id)
+            return latest is not None and (frame_number is None
+                                           or latest[0] >= frame_number)
+
+        with self._cond:
+            if not self._cond.wait_for(ready, timeout):
+                raise RuntimeError(
+                    "Timed out waiting for frame {} of actor {}'s camera".
+                    format(frame_number, actor_id))
+            return self._latest[actor_id][1]
+
+    def stop(self):
+        """Stop the preprocessing thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Skip the frames that were superseded while this thread was busy
+            pending = {item[0]: item[1]}
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    return
+                pending[item[0]] = item[1]
+
+            for actor_id, image in pending.items():
+                config = self._configs.get(actor_id)
+                if config is None:
+                    continue
+                try:
+                    data = preprocess_image(
+                        image, config,
+                        image_buffer(config, self._pin_memory))
+                except Exception:
+                    logger.exception("Failed to preprocess image of %s",
+                                     actor_id)
+                    continue
+                with self._cond:
+                    if actor_id in self._configs:
+                        self._latest[actor_id] = (image.frame_number, data)
+                        self._cond.notify_all()
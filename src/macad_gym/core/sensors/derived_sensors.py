@@ -3,6 +3,10 @@ import weakref
 import math
 import collections
 
+# Sensors are attached at the origin of their parent actor. Built once &
+# shared as spawn_actor only reads it
+SENSOR_TRANSFORM = carla.Transform()
+
 
 class LaneInvasionSensor(object):
     """Lane Invasion class from carla manual_control.py
@@ -18,7 +22,7 @@ class LaneInvasionSensor(object):
         world = self._parent.get_world()
         bp = world.get_blueprint_library().find('sensor.other.lane_detector')
         self.sensor = world.spawn_actor(
-            bp, carla.Transform(), attach_to=self._parent)
+            bp, SENSOR_TRANSFORM, attach_to=self._parent)
         # We need to pass the lambda a weak reference to self to avoid circular
         # reference.
         weak_self = weakref.ref(self)
@@ -86,7 +90,7 @@ class CollisionSensor(object):
         world = self._parent.get_world()
         bp = world.get_blueprint_library().find('sensor.other.collision')
         self.sensor = world.spawn_actor(
-            bp, carla.Transform(), attach_to=self._parent)
+            bp, SENSOR_TRANSFORM, attach_to=self._parent)
         # We need to pass the lambda a weak reference to self to avoid circular
         # reference.
         weak_self = weakref.ref(self)
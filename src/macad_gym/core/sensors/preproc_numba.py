@@ -0,0 +1,54 @@
+"""Numba kernels for the camera image preprocessing in
+`macad_gym.core.sensors.utils`. Importing this module requires numba.
+"""
+import math
+
+import numba
+
+
+# Not parallel: the kernel runs on the collector threads (off the step path).
+# With several envs per process, those threads would launch parallel kernels
+# concurrently, which numba's default workqueue threading layer can't do
+@numba.njit(fastmath=True, nogil=True, cache=True)
+def resize_bgra_to_rgb(src, out):
+    """Resize, convert & normalize a BGRA image in a single pass.
+
+    Approximates cv2.resize(src[:, :, 2::-1], interpolation=cv2.INTER_AREA)
+    followed by (x - 128) / 128, for downscaling only. Each output pixel is
+    the area-weighted mean of the source pixels its footprint covers,
+    rounded half up to uint8 precision. OpenCV rounds differently (& this
+    kernel uses fastmath), so a few pixels can differ by one uint8 level
+    (1 / 128 after the normalization). See tests/test_preproc_numba.py.
+
+    Args:
+        src (numpy.ndarray): (H, W, 4) uint8 BGRA image.
+        out (numpy.ndarray): (y_res, x_res, 3) float32 array to write the
+            normalized RGB image into. y_res <= H and x_res <= W.
+
+    Returns:
+        N/A.
+    """
+    in_h, in_w = src.shape[0], src.shape[1]
+    out_h, out_w = out.shape[0], out.shape[1]
+    scale_y = in_h / out_h
+    scale_x = in_w / out_w
+    inv_area = 1.0 / (scale_x * scale_y)
+    for oy in range(out_h):
+        y0 = oy * scale_y
+        y1 = y0 + scale_y
+        for ox in range(out_w):
+            x0 = ox * scale_x
+            x1 = x0 + scale_x
+            b = 0.0
+            g = 0.0
+            r = 0.0
+            for sy in range(int(y0), min(int(math.ceil(y1)), in_h)):
+                wy = min(y1, sy + 1.0) - max(y0, float(sy))
+                for sx in range(int(x0), min(int(math.ceil(x1)), in_w)):
+                    w = wy * (min(x1, sx + 1.0) - max(x0, float(sx)))
+                    b += w * src[sy, sx, 0]
+                    g += w * src[sy, sx, 1]
+                    r += w * src[sy, sx, 2]
+            out[oy, ox, 0] = (math.floor(r * inv_area + 0.5) - 128.0) / 128.0
+            out[oy, ox, 1] = (math.floor(g * inv_area + 0.5) - 128.0) / 128.0
+            out[oy, ox, 2] = (math.floor(b * inv_area + 0.5) - 128.0) / 128.0
@@ -1,17 +1,134 @@
+import functools
+import logging
+import math
+import os
 import numpy as np
 import cv2
 import sys
 
+logger = logging.getLogger(__name__)
 
-def preprocess_image(image, config):
+try:
+    from macad_gym.core.sensors.preproc_numba import resize_bgra_to_rgb
+except ImportError:
+    logger.info("numba not found. Preprocessing images with OpenCV")
+    resize_bgra_to_rgb = None
+
+# Opt-in: Resize & normalize the RGB camera images on the GPU
+cp = None
+if os.environ.get("CUDA_POSTPROCESS") == "1":
+    try:
+        import cupy as cp
+    except ImportError:
+        logger.warning("CUDA_POSTPROCESS=1 but cupy was not found. "
+                       "Preprocessing images on the CPU")
+
+
+@functools.lru_cache(maxsize=None)
+def _area_weights(in_size, out_size):
+    """(out_size, in_size) device matrix of INTER_AREA weights (downscale)"""
+    scale = in_size / out_size
+    weights = np.zeros((out_size, in_size), dtype=np.float32)
+    for o in range(out_size):
+        start = o * scale
+        end = start + scale
+        for i in range(int(start), min(int(math.ceil(end)), in_size)):
+            weights[o, i] = (min(end, i + 1.0) - max(start, float(i))) / scale
+    return cp.asarray(weights)
+
+
+def _resize_bgra_to_rgb_cuda(src, out):
+    """Same as `resize_bgra_to_rgb` but on the GPU with cupy.
+
+    The full resolution image is uploaded once, resized with two matrix
+    products (rows then columns) & only the small normalized result is
+    copied back into `out`.
+    """
+    in_h, in_w = src.shape[0], src.shape[1]
+    out_h, out_w = out.shape[0], out.shape[1]
+    rgb = cp.asarray(src)[:, :, 2::-1].astype(cp.float32)
+    # (out_h, in_h) @ (in_h, in_w * 3) -> (out_h, in_w, 3)
+    rows = cp.matmul(_area_weights(in_h, out_h), rgb.reshape(in_h, -1))
+    rows = rows.reshape(out_h, in_w, 3)
+    # (out_h, in_w, 3) x (out_w, in_w) -> (out_h, 3, out_w)
+    resized = cp.tensordot(rows, _area_weights(in_w, out_w), axes=([1], [1]))
+    resized = cp.floor(resized.transpose(0, 2, 1) + 0.5)
+    resized -= 128.0
+    resized *= 1.0 / 128
+    resized.get(out=out)
+
+
+def aligned_empty(shape, dtype, alignment=64):
+    """`numpy.empty` whose data starts on an `alignment` bytes boundary.
+
+    Args:
+        shape (tuple): Shape of the array.
+        dtype (numpy.dtype): Data type of the array.
+        alignment (int): Alignment of the data in bytes.
+
+    Returns:
+        numpy.ndarray: Uninitialized array.
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buf = np.empty(nbytes + alignment, dtype=np.uint8)
+    offset = -buf.ctypes.data % alignment
+    return buf[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
+def image_buffer(config, pin_memory=False):
+    """Allocate the output array of `preprocess_image` for an actor.
+
+    Args:
+        config (dict): the config its actor.
+        pin_memory (bool): Allocate the array in page-locked host memory
+            (with torch) so that it can be copied to the GPU asynchronously.
+            Falls back to an aligned array if torch isn't available.
+
+    Returns:
+        numpy.ndarray: Uninitialized (y_res, x_res, 1) uint8 (depth) or
+            (y_res, x_res, 3) float32 (RGB) array.
+    """
+    if config["use_depth_camera"]:
+        shape, dtype = (config["y_res"], config["x_res"], 1), np.uint8
+    else:
+        shape, dtype = (config["y_res"], config["x_res"], 3), np.float32
+    torch = _import_torch() if pin_memory else None
+    if torch is not None:
+        # torch's caching host allocator recycles the pinned blocks once
+        # the arrays are released. The arrays keep their tensor alive
+        return torch.empty(
+            shape, dtype=getattr(torch, np.dtype(dtype).name),
+            pin_memory=True).numpy()
+    return aligned_empty(shape, dtype)
+
+
+@functools.lru_cache(maxsize=None)
+def _import_torch():
+    """torch if it can pin memory (needs CUDA), else None. Imported lazily"""
+    try:
+        import torch
+    except ImportError:
+        logger.warning("torch not found. Not pinning the image memory")
+        return None
+    if not torch.cuda.is_available():
+        logger.warning("CUDA is not available. Not pinning the image memory")
+        return None
+    return torch
+
+
+def preprocess_image(image, config, out=None):
     """Process image raw data to array data.
 
     Args:
         config (dict): the config its actor.
         image (carla.Image): current image raw data.
+        out (numpy.ndarray): Optional preallocated array of shape
+            (y_res, x_res, 1) (depth) or (y_res, x_res, 3) (RGB) to write the
+            processed image into.
 
     Returns:
-        list: Image array.
+        numpy.ndarray: Image array. `out` if it was provided.
     """
 
     # Retrieve data from config
@@ -19,23 +136,40 @@ def preprocess_image(image, config):
     y_res = config["y_res"]
     use_depth_camera = config["use_depth_camera"]
 
+    # Zero-copy BGRA view of the raw image data
+    data = np.ndarray(
+        shape=(image.height, image.width, 4),
+        dtype=np.uint8,
+        buffer=image.raw_data)
+
     # Process image based on config data
     if use_depth_camera:
-        data = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-        data = np.reshape(data, (image.height, image.width, 4))
         data = data[:, :, :1]
         data = data[:, :, ::-1]
         data = cv2.resize(data, (x_res, y_res), interpolation=cv2.INTER_AREA)
         data = np.expand_dims(data, 2)
+        if out is None:
+            return data
+        out[...] = data
     else:
-        data = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-        data = np.reshape(data, (image.height, image.width, 4))
+        if out is None:
+            out = np.empty((y_res, x_res, 3), dtype=np.float32)
+        downscale = image.height >= y_res and image.width >= x_res
+        if cp is not None and downscale:
+            _resize_bgra_to_rgb_cuda(data, out)
+            return out
+        if resize_bgra_to_rgb is not None and downscale:
+            # Fused resize, channel swap & normalization
+            resize_bgra_to_rgb(data, out)
+            return out
         data = data[:, :, :3]
         data = data[:, :, ::-1]
         data = cv2.resize(data, (x_res, y_res), interpolation=cv2.INTER_AREA)
-        data = (data.astype(np.float32) - 128) / 128
+        # (data - 128) / 128 without the intermediate arrays
+        np.subtract(data, 128, out=out, dtype=np.float32)
+        out *= 1.0 / 128
 
-    return data
+    return out
 
 
 def get_transform_from_nearest_way_point(cur_map, cur_location, dst_location):
@@ -6,18 +6,12 @@
 # This work is licensed under the terms of the MIT license.
 # For a copy, see <https://opensource.org/licenses/MIT>.
 
-import glob
-import os
-import sys
 import itertools
 
-try:
-    sys.path.append(
-        glob.glob('../../carla/PythonAPI/**/*%d.%d-%s.egg' %
-                  (sys.version_info.major, sys.version_info.minor,
-                   'win-amd64' if os.name == 'nt' else 'linux-x86_64'))[0])
-except IndexError:
-    pass
+from macad_gym.core.carla_egg import add_carla_egg_to_path
+
+if add_carla_egg_to_path('../../carla/PythonAPI/*/*') is None:
+    print("CARLA egg not found. Using the installed carla package, if any")
 
 import carla
 
@@ -1,6 +1,7 @@
 import pygame
 import random
 import logging
+import math
 import numpy as np
 import time
 import carla
@@ -28,6 +29,12 @@ COMMANDS_ENUM = {
     2.0: "LANE_FOLLOW",
 }
 
+# Planner command (float) to one-hot encoding index, built once at import
+COMMAND_FLOAT_TO_ORDINAL = {
+    k: COMMAND_ORDINAL[v]
+    for k, v in COMMANDS_ENUM.items()
+}
+
 DISCRETE_ACTIONS = {
     # coast
     0: [0.0, 0.0],
@@ -88,11 +95,10 @@ class VehicleManager(object):
 
     def set_world(self, world):
         """Set world."""
+        weather = world.get_weather()
         self._weather = [
-            world.get_weather().cloudyness,
-            world.get_weather().precipitation,
-            world.get_weather().precipitation_deposits,
-            world.get_weather().wind_intensity
+            weather.cloudyness, weather.precipitation,
+            weather.precipitation_deposits, weather.wind_intensity
         ]
         self._world = world
 
@@ -232,17 +238,22 @@ class VehicleManager(object):
         planner = self._planner
         end_loc = self._end_transform.location
         end_rot = self._end_transform.rotation
+        # Snapshot the actor state once. Every getter is a server round trip
+        transform = cur.get_transform()
+        loc = transform.location
+        rot = transform.rotation
+        vel = cur.get_velocity()
+        cur_pos = [loc.x, loc.y, GROUND_Z]
+        cur_ori = [rot.pitch, rot.yaw, GROUND_Z]
+        end_pos = [end_loc.x, end_loc.y, GROUND_Z]
 
         if planner_enabled:
-            next_command = COMMANDS_ENUM[planner.get_next_command(
-                [cur.get_location().x,
-                 cur.get_location().y, GROUND_Z], [
-                     cur.get_transform().rotation.pitch,
-                     cur.get_transform().rotation.yaw, GROUND_Z
-                 ], [end_loc.x, end_loc.y, GROUND_Z],
-                [end_rot.pitch, end_rot.yaw, GROUND_Z])]
+            next_command_f = planner.get_next_command(
+                cur_pos, cur_ori, end_pos,
+                [end_rot.pitch, end_rot.yaw, GROUND_Z])
         else:
-            next_command = "LANE_FOLLOW"
+            next_command_f = 2.0  # LANE_FOLLOW
+        next_command = COMMANDS_ENUM[next_command_f]
 
         collision_vehicles = self._collision_sensor.collision_vehicles
         collision_pedestrians = self._collision_sensor.collision_pedestrians
@@ -257,28 +268,21 @@ class VehicleManager(object):
             distance_to_goal = 0.0  # avoids crash in planner
         elif planner_enabled:
             distance_to_goal = planner.get_shortest_path_distance(
-                [cur.get_location().x,
-                 cur.get_location().y, GROUND_Z], [
-                     cur.get_transform().rotation.pitch,
-                     cur.get_transform().rotation.yaw, GROUND_Z
-                 ], [end_loc.x, end_loc.y, GROUND_Z],
+                cur_pos, cur_ori, end_pos,
                 [end_rot.pitch, end_rot.yaw, 0]) / 100
         else:
             distance_to_goal = -1
 
-        distance_to_goal_euclidean = float(
-            np.linalg.norm([
-                cur.get_location().x - end_loc.x,
-                cur.get_location().y - end_loc.y
-            ]) / 100)
+        distance_to_goal_euclidean = math.hypot(loc.x - end_loc.x,
+                                                loc.y - end_loc.y) / 100
 
         py_measurements = {
-            "x": cur.get_location().x,
-            "y": cur.get_location().y,
-            "pitch": cur.get_transform().rotation.pitch,
-            "yaw": cur.get_transform().rotation.yaw,
-            "roll": cur.get_transform().rotation.roll,
-            "forward_speed": cur.get_velocity().x,
+            "x": loc.x,
+            "y": loc.y,
+            "pitch": rot.pitch,
+            "yaw": rot.yaw,
+            "roll": rot.roll,
+            "forward_speed": vel.x,
             "distance_to_goal": distance_to_goal,
             "distance_to_goal_euclidean": distance_to_goal_euclidean,
             "collision_vehicles": collision_vehicles,
@@ -289,6 +293,7 @@ class VehicleManager(object):
             "map": self._config["server_map"],
             "current_scenario": self._scenario,
             "next_command": next_command,
+            "next_command_f": next_command_f,
             "previous_actions": self.previous_actions,
             "previous_rewards": self.previous_rewards
         }
@@ -318,7 +323,7 @@ class VehicleManager(object):
             return image
         obs = (
             image,  # 'Vehicle number: ', vehicle_number,
-            COMMAND_ORDINAL[py_measurements["next_command"]],
+            COMMAND_FLOAT_TO_ORDINAL[py_measurements["next_command_f"]],
             [
                 py_measurements["forward_speed"],
                 py_measurements["distance_to_goal"]
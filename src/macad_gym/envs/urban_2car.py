@@ -112,6 +112,4 @@ if __name__ == "__main__":
             print(":{}\n\t".join(["Step#", "rew", "ep_rew", "done{}"]).format(
                 i, reward, total_reward_dict, done))
 
-            time.sleep(0.1)
-
         print("{} fps".format(i / (time.time() - start)))
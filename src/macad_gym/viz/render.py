@@ -1,4 +1,5 @@
 import math
+import numpy as np
 import pygame
 
 i = 0
@@ -25,7 +26,9 @@ def multi_view_render(images, unit_dimension, actor_configs):
     for actor_id, im in images.items():
         if not actor_configs[actor_id]["render"]:
             continue
-        surface = pygame.surfarray.make_surface(im.swapaxes(0, 1) * 128 + 128)
+        # asarray: the images can be LazyFrames
+        surface = pygame.surfarray.make_surface(
+            np.asarray(im).swapaxes(0, 1) * 128 + 128)
         surface_seq += ((surface, (poses[actor_id][1], poses[actor_id][0])), )
 
     display = pygame.display.set_mode((window_dim[0], window_dim[1]),
@@ -0,0 +1,64 @@
+"""Tests for the struct-of-arrays per-actor state"""
+from macad_gym.core.actor_table import ActorTable, MEAS_DTYPE, \
+    ACTOR_FLAG_COLLISION, ACTOR_FLAG_EARLY_TERM, ACTOR_FLAG_MANUAL_CTRL, \
+    pack_actor_flags
+
+
+def test_slots_follow_the_actor_order():
+    table = ActorTable(["car1", "car2", "ped1"])
+    assert len(table) == 3
+    assert table.ids == ["car1", "car2", "ped1"]
+    assert [table.id_to_slot[a] for a in table.ids] == [0, 1, 2]
+    assert table.meas.dtype == MEAS_DTYPE
+    assert table.meas.shape == table.prev_meas.shape == (3, )
+
+
+def test_reset_clears_the_episode_state_of_one_actor():
+    table = ActorTable(["car1", "car2"])
+    table.num_steps[:] = 5
+    table.total_reward[:] = 2.5
+    table.reset(1)
+    assert list(table.num_steps) == [5, 0]
+    assert list(table.total_reward) == [2.5, 0.0]
+
+
+def test_pack_actor_flags():
+    flags = pack_actor_flags({
+        "collision_sensor": "on",
+        "lane_sensor": "off",
+        "early_terminate_on_collision": True,
+        "manual_control": False,
+    })
+    assert flags == ACTOR_FLAG_COLLISION | ACTOR_FLAG_EARLY_TERM
+    assert not flags & ACTOR_FLAG_MANUAL_CTRL
+    assert pack_actor_flags({}) == 0
+
+
+def test_done_mask():
+    table = ActorTable(["car1", "car2", "car3"])
+    assert not table.all_done()
+    table.mark_done(0)
+    table.mark_done(2)
+    assert [table.is_done(s) for s in range(3)] == [True, False, True]
+    assert not table.all_done()
+    table.mark_done(1)
+    table.mark_done(1)  # Idempotent
+    assert table.all_done()
+    table.clear_done(0)
+    assert not table.is_done(0) and table.is_done(1) and table.is_done(2)
+    assert not table.all_done()
+    table.mark_done(0)
+    table.reset(2)
+    assert not table.is_done(2)
+    assert not table.all_done()
+
+
+def test_done_mask_more_actors_than_bits_in_a_word():
+    ids = ["car{}".format(i) for i in range(70)]
+    table = ActorTable(ids)
+    for slot in range(len(ids)):
+        table.mark_done(slot)
+    assert table.all_done()
+    table.clear_done(69)
+    assert table.is_done(68) and not table.is_done(69)
+    assert not table.all_done()
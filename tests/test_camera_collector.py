@@ -0,0 +1,102 @@
+"""Tests for the background camera image preprocessing"""
+import threading
+
+import numpy as np
+import pytest
+
+from macad_gym.core.sensors.collector import CameraCollector
+
+CONFIG = {"x_res": 8, "y_res": 6, "use_depth_camera": False}
+
+
+class FakeImage(object):
+    """Stand-in for a carla.Image"""
+
+    def __init__(self, frame_number, value, height=12, width=16):
+        self.frame_number = frame_number
+        self.height = height
+        self.width = width
+        self.raw_data = np.full((height, width, 4), value,
+                                dtype=np.uint8).tobytes()
+
+
+class FakeCamera(object):
+    """Stand-in for a CameraManager. Only has the `on_image` hook"""
+
+    def __init__(self):
+        self.on_image = None
+
+
+@pytest.fixture
+def collector():
+    collector = CameraCollector()
+    yield collector
+    collector.stop()
+
+
+def test_get_returns_the_preprocessed_image(collector):
+    camera = FakeCamera()
+    collector.add_camera("car1", camera, CONFIG)
+    camera.on_image(FakeImage(1, 192))
+    image = collector.get("car1", 1, timeout=5.0)
+    assert image.shape == (6, 8, 3)
+    np.testing.assert_allclose(image, 0.5)  # (192 - 128) / 128
+
+
+def test_get_waits_for_the_requested_frame(collector):
+    camera = FakeCamera()
+    collector.add_camera("car1", camera, CONFIG)
+    camera.on_image(FakeImage(1, 128))
+    assert collector.get("car1", 1, timeout=5.0).max() == 0.0
+
+    timer = threading.Timer(0.1, camera.on_image, (FakeImage(2, 255), ))
+    timer.start()
+    try:
+        image = collector.get("car1", 2, timeout=5.0)
+    finally:
+        timer.join()
+    assert image.min() > 0.99
+
+
+def test_get_accepts_newer_frames(collector):
+    camera = FakeCamera()
+    collector.add_camera("car1", camera, CONFIG)
+    camera.on_image(FakeImage(5, 0))
+    assert collector.get("car1", 3, timeout=5.0).max() == -1.0
+    assert collector.get("car1", timeout=5.0).max() == -1.0
+
+
+def test_get_times_out(collector):
+    camera = FakeCamera()
+    collector.add_camera("car1", camera, CONFIG)
+    camera.on_image(FakeImage(1, 0))
+    with pytest.raises(RuntimeError):
+        collector.get("car1", 2, timeout=0.1)
+    with pytest.raises(RuntimeError):
+        collector.get("car2", timeout=0.1)
+
+
+def test_remove_all_forgets_the_images(collector):
+    camera = FakeCamera()
+    collector.add_camera("car1", camera, CONFIG)
+    camera.on_image(FakeImage(1, 0))
+    collector.get("car1", 1, timeout=5.0)
+    collector.remove_all()
+    with pytest.raises(RuntimeError):
+        collector.get("car1", timeout=0.1)
+
+
+def test_wait_returns_the_cameras_without_images(collector):
+    cameras = {"car1": FakeCamera(), "car2": FakeCamera()}
+    for actor_id, camera in cameras.items():
+        collector.add_camera(actor_id, camera, CONFIG)
+    cameras["car1"].on_image(FakeImage(1, 0))
+    assert collector.wait(["car1", "car2"], timeout=0.5) == ["car2"]
+
+    timer = threading.Timer(0.1, cameras["car2"].on_image,
+                            (FakeImage(1, 0), ))
+    timer.start()
+    try:
+        assert collector.wait(["car1", "car2"], timeout=5.0) == []
+    finally:
+        timer.join()
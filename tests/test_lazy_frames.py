@@ -0,0 +1,41 @@
+"""Tests for the framestacked LazyFrames observations"""
+import numpy as np
+import pytest
+
+from macad_gym.core.lazy_frames import LazyFrames
+
+
+@pytest.fixture
+def frames():
+    return [np.full((2, 3, 3), i, dtype=np.float32) for i in range(4)]
+
+
+def test_matches_concatenated_frames(frames):
+    obs = LazyFrames(frames)
+    expected = np.concatenate(frames, axis=0)
+    assert obs.shape == expected.shape == (8, 3, 3)
+    assert obs.dtype == np.float32
+    assert len(obs) == 8
+    np.testing.assert_array_equal(np.asarray(obs), expected)
+    np.testing.assert_array_equal(obs[2], expected[2])
+    # Unchanged once concatenated
+    assert obs.shape == expected.shape and obs.dtype == np.float32
+
+
+def test_concatenates_once(frames):
+    obs = LazyFrames(frames)
+    assert np.asarray(obs) is np.asarray(obs)
+
+
+def test_shares_frames_with_the_next_obs(frames):
+    obs = LazyFrames(frames[:3])
+    next_obs = LazyFrames(frames[1:])
+    assert next_obs._frames[0] is obs._frames[1]
+
+
+def test_array_dtype_and_copy(frames):
+    obs = LazyFrames(frames)
+    assert np.asarray(obs, dtype=np.float64).dtype == np.float64
+    copy = np.array(obs, copy=True)
+    copy[:] = -1
+    assert np.asarray(obs).min() == 0
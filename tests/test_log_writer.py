@@ -0,0 +1,60 @@
+"""Tests for the background measurement log writer"""
+import os
+import time
+
+from macad_gym.core.log_writer import LogWriter
+
+
+def test_lines_are_written_in_order(tmp_path):
+    path = str(tmp_path / "log.json")
+    writer = LogWriter(maxsize=4)  # Small queue: write() has to block
+    lines = [b"line %d\n" % i for i in range(100)]
+    for line in lines:
+        writer.write(path, line)
+    writer.stop()
+    with open(path, "rb") as log_file:
+        assert log_file.read() == b"".join(lines)
+
+
+def test_lines_of_several_files(tmp_path):
+    paths = [str(tmp_path / "log{}.json".format(i)) for i in range(3)]
+    writer = LogWriter()
+    for i in range(10):
+        for path in paths:
+            writer.write(path, path.encode() + b" %d\n" % i)
+    writer.stop()
+    for path in paths:
+        with open(path, "rb") as log_file:
+            assert log_file.read().splitlines() == [
+                path.encode() + b" %d" % i for i in range(10)
+            ]
+
+
+def test_close_file_flushes_the_file(tmp_path):
+    path = str(tmp_path / "log.json")
+    # Large buffer: nothing reaches the file until it's flushed
+    writer = LogWriter(buffering=1 << 20)
+    writer.write(path, b"first\n")
+    writer.close_file(path)
+    deadline = time.monotonic() + 5.0
+    content = b""
+    while time.monotonic() < deadline:
+        if os.path.exists(path):
+            with open(path, "rb") as log_file:
+                content = log_file.read()
+            if content:
+                break
+        time.sleep(0.01)
+    writer.stop()
+    assert content == b"first\n"
+
+
+def test_write_after_close_recreates_the_file(tmp_path):
+    path = str(tmp_path / "log.json")
+    writer = LogWriter()
+    writer.write(path, b"old episode\n")
+    writer.close_file(path)
+    writer.write(path, b"new episode\n")
+    writer.stop()
+    with open(path, "rb") as log_file:
+        assert log_file.read() == b"new episode\n"
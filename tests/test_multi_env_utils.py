@@ -0,0 +1,62 @@
+"""Unit tests for the module-level helpers of multi_env"""
+import math
+
+import pytest
+
+from macad_gym.carla.multi_env import get_next_actions, sigmoid, \
+    CONTINUOUS_FORWARD_ACTION, DISCRETE_ACTIONS
+
+
+@pytest.mark.parametrize("command, action", [
+    ("REACH_GOAL", 0),
+    ("GO_STRAIGHT", 3),
+    ("TURN_RIGHT", 6),
+    ("TURN_LEFT", 5),
+    ("LANE_FOLLOW", 3),
+])
+def test_get_next_actions_discrete(command, action):
+    actions = get_next_actions({"car1": {"next_command": command}}, True)
+    assert actions == {"car1": action}
+    assert action in DISCRETE_ACTIONS
+
+
+def test_get_next_actions_unknown_command():
+    assert get_next_actions({"car1": {"next_command": "?"}}, True) == {
+        "car1": 0
+    }
+
+
+def test_get_next_actions_several_actors():
+    measurements = {
+        "car1": {"next_command": "TURN_LEFT"},
+        "car2": {"next_command": "TURN_RIGHT"},
+    }
+    assert get_next_actions(measurements, True) == {"car1": 5, "car2": 6}
+    assert get_next_actions(measurements, False) == {
+        "car1": CONTINUOUS_FORWARD_ACTION,
+        "car2": CONTINUOUS_FORWARD_ACTION
+    }
+    assert tuple(CONTINUOUS_FORWARD_ACTION) == (1, 0)
+
+
+@pytest.mark.parametrize("x", [-5.0, -0.5, 0.0, 0.5, 5.0])
+def test_sigmoid(x):
+    assert sigmoid(x) == pytest.approx(1.0 / (1.0 + math.exp(-x)))
+
+
+@pytest.mark.parametrize("x, expected", [
+    (-1000.0, 0.0),
+    (-800.0, 0.0),
+    (800.0, 1.0),
+    (1000.0, 1.0),
+    (1e308, 1.0),
+    (-1e308, 0.0),
+])
+def test_sigmoid_large_magnitude(x, expected):
+    # Must not overflow (math.exp(800) raises OverflowError)
+    assert sigmoid(x) == expected
+
+
+def test_sigmoid_symmetry():
+    for x in (0.1, 3.0, 30.0, 300.0):
+        assert sigmoid(x) + sigmoid(-x) == pytest.approx(1.0)
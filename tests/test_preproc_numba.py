@@ -0,0 +1,40 @@
+"""Tests for the numba image preprocessing kernel against OpenCV"""
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("numba")
+
+from macad_gym.core.sensors.preproc_numba import resize_bgra_to_rgb  # noqa
+
+# Max. difference from OpenCV, in uint8 levels, & max. fraction of the
+# pixels that may differ at all
+TOLERANCE_LEVELS = 1
+MAX_DIFFERENT_FRACTION = 0.01
+
+
+def opencv_reference(src, out_h, out_w):
+    rgb = np.ascontiguousarray(src[:, :, 2::-1])
+    resized = cv2.resize(rgb, (out_w, out_h), interpolation=cv2.INTER_AREA)
+    return (resized.astype(np.float32) - 128) / 128
+
+
+@pytest.mark.parametrize(
+    "in_shape, out_shape",
+    [
+        ((168, 168), (84, 84)),  # Integer scale (OpenCV's fast path)
+        ((600, 800), (84, 84)),
+        ((100, 120), (84, 84)),
+        ((601, 799), (63, 97)),
+        ((84, 84), (84, 84)),  # No resize
+    ])
+def test_matches_opencv_inter_area(in_shape, out_shape):
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        src = rng.integers(0, 256, in_shape + (4, ), dtype=np.uint8)
+        out = np.empty(out_shape + (3, ), dtype=np.float32)
+        resize_bgra_to_rgb(src, out)
+
+        levels = np.abs(out - opencv_reference(src, *out_shape)) * 128
+        assert levels.max() <= TOLERANCE_LEVELS + 1e-4
+        assert np.mean(levels > 1e-4) <= MAX_DIFFERENT_FRACTION
@@ -0,0 +1,76 @@
+"""Tests for the vectorized reward computation"""
+import numpy as np
+import pytest
+
+from macad_gym.carla.reward import Reward
+from macad_gym.core.actor_table import MEAS_DTYPE
+
+REWARD_FUNCTIONS = ["corl2017", "lane_keep", "custom"]
+
+
+def random_measurements(rng, n):
+    meas = np.zeros(n, dtype=MEAS_DTYPE)
+    for name in ("x", "y", "pitch", "yaw", "roll"):
+        meas[name] = rng.uniform(-100.0, 100.0, n)
+    meas["forward_speed"] = rng.uniform(-5.0, 40.0, n)
+    meas["distance_to_goal"] = rng.uniform(0.0, 50.0, n)
+    meas["distance_to_goal_euclidean"] = rng.uniform(0.0, 50.0, n)
+    # Mostly no (new) collisions & lane invasions
+    for name in ("collision_vehicles", "collision_pedestrians",
+                 "collision_other", "intersection_offroad",
+                 "intersection_otherlane"):
+        meas[name] = rng.choice([0, 0, 0, 1, 3], n)
+    meas["reached_goal"] = rng.random(n) < 0.3
+    return meas
+
+
+def as_dict(meas):
+    """MEAS_DTYPE row as the measurements dict `compute_reward` reads"""
+    py_meas = {name: meas[name].item() for name in MEAS_DTYPE.names}
+    py_meas["next_command"] = \
+        "REACH_GOAL" if meas["reached_goal"] else "LANE_FOLLOW"
+    return py_meas
+
+
+@pytest.mark.parametrize("flag", REWARD_FUNCTIONS)
+def test_compute_rewards_matches_compute_reward(flag):
+    rng = np.random.default_rng(0)
+    n = 256
+    prev = random_measurements(rng, n)
+    curr = random_measurements(rng, n)
+    # Include actors with no change between the steps
+    curr[:16] = prev[:16]
+
+    rewards = Reward.compute_rewards(prev, curr, [flag] * n)
+
+    expected = [
+        Reward().compute_reward(as_dict(prev[i]), as_dict(curr[i]), flag)
+        for i in range(n)
+    ]
+    np.testing.assert_allclose(rewards, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_compute_rewards_mixed_flags():
+    rng = np.random.default_rng(1)
+    n = 30
+    prev = random_measurements(rng, n)
+    curr = random_measurements(rng, n)
+    flags = [REWARD_FUNCTIONS[i % 3] for i in range(n)]
+
+    rewards = Reward.compute_rewards(prev, curr, flags)
+
+    for i, flag in enumerate(flags):
+        assert rewards[i] == pytest.approx(
+            Reward().compute_reward(
+                as_dict(prev[i]), as_dict(curr[i]), flag))
+
+
+def test_compute_rewards_empty():
+    meas = np.zeros(0, dtype=MEAS_DTYPE)
+    assert Reward.compute_rewards(meas, meas, []).shape == (0, )
+
+
+def test_compute_rewards_unknown_flag():
+    meas = np.zeros(1, dtype=MEAS_DTYPE)
+    with pytest.raises(ValueError):
+        Reward.compute_rewards(meas, meas, ["unknown"])